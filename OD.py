@@ -31,7 +31,7 @@ def main():
 
 # Keep original imports for backward compatibility
 try:
-    from gemini_ACCESS import process_image_and_objects_for_resale, process_text_with_gemini
+    from gemini_ACCESS import process_image_and_objects_for_resale
     print("✅ Gemini integration available")
 except ImportError:
     print("⚠️ Gemini integration not available")
@@ -1,10 +1,27 @@
 # declutter_detector.py
+import argparse
 import cv2
+import numpy as np
 import time
 import os
-import glob
+import shutil
+import signal
+import queue
+import threading
+import asyncio
+import random
+from google.api_core import exceptions as google_exceptions
+from concurrent.futures import ThreadPoolExecutor
+
+# Optional: libjpeg-turbo SIMD encoder (pip install PyTurboJPEG, system package libturbojpeg0-dev)
+try:
+    from turbojpeg import TurboJPEG
+    TURBO_JPEG = TurboJPEG()
+except Exception:
+    TURBO_JPEG = None
 # Import the function that interacts with the Gemini API (replace the mock with your actual file)
-from gemini_ACCESS import process_image_with_gemini 
+import gemini_ACCESS
+from gemini_ACCESS import process_image_with_gemini, parse_gemini_list
 
 
 
@@ -12,13 +29,105 @@ from gemini_ACCESS import process_image_with_gemini
 CAPTURE_FOLDER = "captures"
 ANALYSIS_DURATION_SECONDS = 10
 CAMERA_INDEX = 0  # Changed from 1 to 0, as 0 is usually the default camera. Change back to 1 if necessary.
-MOTION_THRESHOLD = 5000 
+CAMERA_FRAME_SIZE = (1280, 720) # Requested capture resolution (the camera may pick the nearest mode)
+MOTION_FRAME_SIZE = (320, 180) # Motion is measured on a downsampled frame
+MOTION_PIXEL_THRESHOLD = 25 # Per-pixel grey delta that counts as "changed"
+MOTION_THRESHOLD = 900 # Changed pixels (of 320x180) present in both consecutive diffs
 REPORT_FILENAME = "analysis_report.txt" # Static report file name
 MAX_CAPTURES = 6 # Maximum number of images to capture
 CAPTURE_COOLDOWN_SECONDS = 1.0 # NEW: Minimum time between captures
+GEMINI_CONCURRENCY = 5 # Maximum Gemini requests in flight at once
+DUPLICATE_HASH_DISTANCE = 6 # dHash bits that may differ for two captures to count as the same scene
+CAPTURE_MAX_EDGE = 1024 # Captures are shrunk to this long edge before JPEG encoding
+# Captures stay in memory and go straight to Gemini; set to 1 to also keep JPEGs on disk
+SAVE_CAPTURES = os.environ.get("DECLUTTER_SAVE_CAPTURES", "0") == "1"
+# No preview window (servers / CI): skips putText, imshow and waitKey; Ctrl+C stops the loop
+HEADLESS = os.environ.get("DECLUTTER_HEADLESS", "0") == "1"
+CAPTURE_WRITE_QUEUE_SIZE = 8 # Captures waiting for the background JPEG writer
+GEMINI_MAX_RETRIES = 5 # Retries for rate-limit / transient Gemini errors
+GEMINI_BACKOFF_BASE_SECONDS = 1.0
+# Only transient errors are retried; everything else fails fast
+RETRYABLE_GEMINI_ERRORS = (
+    google_exceptions.ResourceExhausted,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.DeadlineExceeded,
+)
+PREVIEW_FRAME_MS = 15 # waitKey delay per loop; paces the preview at ~66fps instead of spinning
 
 # --- Helper Functions ---
 
+def start_capture_writer(on_saved):
+    """
+    Starts a daemon thread that encodes queued (filename, frame) captures (writing them
+    to disk only if SAVE_CAPTURES), calling on_saved(filename, jpeg_bytes, frame_hash)
+    after each.
+    Put None on the queue to stop it.
+    """
+    write_queue = queue.Queue(maxsize=CAPTURE_WRITE_QUEUE_SIZE)
+
+    def worker():
+        while True:
+            item = write_queue.get()
+            try:
+                if item is None:
+                    return
+                filename, frame = item
+                jpeg_bytes = encode_capture(frame)
+                if SAVE_CAPTURES:
+                    with open(filename, "wb") as f:
+                        f.write(jpeg_bytes)
+                on_saved(filename, jpeg_bytes, frame_dhash(frame))
+            except Exception as e:
+                print(f"[ERROR] Failed to save capture. Reason: {e}")
+            finally:
+                write_queue.task_done()
+
+    threading.Thread(target=worker, daemon=True).start()
+    return write_queue
+
+
+def list_files(folder, prefix="", suffix=""):
+    """
+    Returns sorted paths of regular files in folder matching prefix/suffix. Uses
+    os.scandir so the file type comes from the directory entry without a stat() call.
+    """
+    with os.scandir(folder) as entries:
+        return sorted(
+            entry.path for entry in entries
+            if entry.name.startswith(prefix) and entry.name.endswith(suffix)
+            and entry.is_file(follow_symlinks=False)
+        )
+
+def frame_dhash(frame):
+    """Returns a 64-bit difference hash of a BGR frame (9x8 grey, left/right gradients)."""
+    small = cv2.cvtColor(cv2.resize(frame, (9, 8), interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def find_near_duplicate(image_hash, known_hashes):
+    """Returns the name of a previous capture whose hash is within DUPLICATE_HASH_DISTANCE, if any."""
+    for name, known_hash in known_hashes.items():
+        if bin(image_hash ^ known_hash).count("1") < DUPLICATE_HASH_DISTANCE:
+            return name
+    return None
+
+
+def encode_capture(frame):
+    """
+    Shrinks a BGR frame to CAPTURE_MAX_EDGE (Lanczos) and encodes it to JPEG bytes in
+    memory, using libjpeg-turbo when it is installed.
+    """
+    height, width = frame.shape[:2]
+    scale = CAPTURE_MAX_EDGE / max(height, width)
+    if scale < 1:
+        frame = cv2.resize(frame, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_LANCZOS4)
+    if TURBO_JPEG is not None:
+        return TURBO_JPEG.encode(frame, quality=85)
+    _, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
+    return buffer.tobytes()
+
+
 def cleanup_old_reports():
     """Deletes all previous analysis report files in the current directory."""
     # 1. Look for the static report file and delete it
@@ -30,7 +139,7 @@ def cleanup_old_reports():
             print(f"[ERROR] Failed to delete old report {REPORT_FILENAME}. Reason: {e}")
     
     # 2. Also clean up any legacy timestamped reports just in case
-    legacy_reports = glob.glob("analysis_report_*.txt") 
+    legacy_reports = list_files(".", prefix="analysis_report_", suffix=".txt")
     if legacy_reports:
          print(f"[INFO] Cleaning up {len(legacy_reports)} legacy timestamped report files...")
          for report_file in legacy_reports:
@@ -42,7 +151,8 @@ def cleanup_old_reports():
 
 def write_analysis_report(results):
     """
-    Writes the collected analysis results to a single file named REPORT_FILENAME.
+    Writes analysis results to a single file named REPORT_FILENAME. `results` may be
+    a generator; each line is flushed as soon as it is produced.
     """
     # 1. Clean up old reports first (ensures only one report exists)
     cleanup_old_reports()
@@ -50,16 +160,18 @@ def write_analysis_report(results):
     # 2. Use the static file name
     report_filename = REPORT_FILENAME
     
-    print(f"\n[INFO] Writing final analysis report to {report_filename}...")
+    print(f"\n[INFO] Writing analysis report to {report_filename} as results arrive...")
     
     try:
         with open(report_filename, "w") as f:
-            if not results:
+            wrote_results = False
+            # Write only the raw results (filename : [objects identified])
+            for result in results:
+                f.write(result + "\n")
+                f.flush() # A crash mid-analysis still leaves the finished lines on disk
+                wrote_results = True
+            if not wrote_results:
                 f.write("No significant scene changes were detected.\n")
-            else:
-                # Write only the raw results (filename : [objects identified])
-                for result in results:
-                    f.write(result + "\n")
         print(f"[SUCCESS] Report saved successfully.")
     except IOError as e:
         print(f"[ERROR] Could not write report file: {e}")
@@ -68,52 +180,103 @@ def write_analysis_report(results):
 def parse_gemini_list_string(s):
     """
     Attempts to parse a string representation of a Python list (e.g., "['item1', 'item2']")
-    into a proper list of strings.
+    into a proper list of strings. Parsing is literal-only (json / ast), never eval().
     """
-    if s.startswith("[") and s.endswith("]"):
-        s = s.strip("[]").replace("'", "").replace('"', '')
-        # Simple split, stripping whitespace
-        return [item.strip() for item in s.split(',') if item.strip()]
-    return []
+    return parse_gemini_list(s)
 
 
-def process_saved_captures(folder):
+async def call_with_backoff(fn, *args, retries=GEMINI_MAX_RETRIES, base=GEMINI_BACKOFF_BASE_SECONDS):
+    """
+    Runs a blocking Gemini call in a worker thread, retrying 429/503/timeout errors
+    with exponential backoff plus jitter.
+    """
+    for attempt in range(retries + 1):
+        try:
+            return await asyncio.to_thread(fn, *args)
+        except RETRYABLE_GEMINI_ERRORS as e:
+            if attempt == retries:
+                raise
+            delay = base * 2 ** attempt + random.random()
+            print(f"  [WARN] Gemini transient error ({type(e).__name__}), retrying in {delay:.1f}s...")
+            await asyncio.sleep(delay)
+
+
+async def analyze_captures(image_paths, pending_analyses, captured_frames):
+    """
+    Starts Gemini on every capture concurrently (bounded by GEMINI_CONCURRENCY) and
+    returns one task per capture, in image_paths order.
+    """
+    semaphore = asyncio.Semaphore(GEMINI_CONCURRENCY)
+
+    async def analyze(path):
+        pending = pending_analyses.get(path)
+        if pending:
+            try:
+                return await asyncio.wrap_future(pending)
+            except RETRYABLE_GEMINI_ERRORS:
+                pass # Transient failure during capture; retry below with backoff
+        async with semaphore:
+            return await call_with_backoff(process_image_with_gemini, captured_frames.get(path, path))
+
+    return [asyncio.create_task(analyze(path)) for path in image_paths]
+
+
+def process_saved_captures(folder, pending_analyses=None, captured_frames=None):
     """
     Processes all images in the specified folder using the Gemini API and
     checks for object redundancy against previously processed images.
+    Yields one report line per capture, in order, as soon as its analysis is done.
+    pending_analyses maps filenames to Gemini futures already started during capture;
+    those results are reused instead of calling Gemini again.
+    captured_frames maps capture names to in-memory JPEG bytes; when given, those
+    captures are analyzed instead of the files in folder.
     """
+    pending_analyses = pending_analyses or {}
+    captured_frames = captured_frames or {}
     print("\n[INFO] Starting batch analysis of saved captures with Gemini...")
-    analysis_results = []
-    # Set to track all unique objects encountered across all images
-    all_detected_objects = set() 
     
     # Get all jpg files in the capture folder and sort them by name (timestamp)
-    image_paths = sorted(glob.glob(os.path.join(folder, "*.jpg")))
+    image_paths = sorted(captured_frames) if captured_frames else list_files(folder, suffix=".jpg")
     
     if not image_paths:
         print("[INFO] No captured images found for analysis.")
-        return analysis_results
+        return
+
+    # Fan out all Gemini calls at once; redundancy is still resolved in filename order below,
+    # waiting only on the next capture's task while the rest keep running
+    loop = asyncio.new_event_loop()
+    tasks = loop.run_until_complete(analyze_captures(image_paths, pending_analyses, captured_frames))
 
-    for i, filename in enumerate(image_paths):
-        print(f"[Analysis {i+1}/{len(image_paths)}] Processing {os.path.basename(filename)}...")
+    try:
+        yield from resolve_redundancy(loop, image_paths, tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+        loop.close()
+    print("[INFO] Batch analysis complete.")
+
+
+def resolve_redundancy(loop, image_paths, tasks):
+    """Yields the report line for each capture, marking objects already seen as redundant."""
+    # Set to track all unique objects encountered across all images
+    all_detected_objects = set() 
+    
+    total_images = len(image_paths)
+    for i, (filename, task) in enumerate(zip(image_paths, tasks)):
+        print(f"[Analysis {i+1}/{total_images}] Processing {os.path.basename(filename)}...")
         
         try:
-            # Call Gemini for analysis (returns a string like "['laptop', 'coffee cup']")
-            gemini_raw_result = process_image_with_gemini(filename)
+            # Gemini's reply is a string like "['laptop', 'coffee cup']"; API errors raise here
+            gemini_raw_result = loop.run_until_complete(task)
             current_objects = parse_gemini_list_string(gemini_raw_result)
             
-            new_objects = []
-            redundant_objects = []
-            
-            # Check redundancy and populate the master set
-            for obj in current_objects:
-                # Normalize case for reliable checking
-                normalized_obj = obj.lower()
-                if normalized_obj in all_detected_objects:
-                    redundant_objects.append(obj)
-                else:
-                    new_objects.append(obj)
-                    all_detected_objects.add(normalized_obj) # Add new unique object to the master set
+            # Check redundancy with set operations on case-normalized names (reply order is kept)
+            current = {obj.lower(): obj for obj in current_objects}
+            new_keys = current.keys() - all_detected_objects
+            new_objects = [obj for key, obj in current.items() if key in new_keys]
+            redundant_objects = [obj for key, obj in current.items() if key not in new_keys]
+            all_detected_objects |= new_keys # Add new unique objects to the master set
 
             # Format the output for the console (full detail)
             if new_objects or redundant_objects:
@@ -129,42 +292,58 @@ def process_saved_captures(folder):
             report_output = f"NEW: {new_objects}" if new_objects else "No NEW objects detected."
             formatted_result = f"{filename} : [{report_output}]"
             
-            analysis_results.append(formatted_result)
+            yield formatted_result
             print(f"  [SUCCESS] Full Analysis: {console_output}")
             
         except Exception as e:
             print(f"  [ERROR] Gemini call failed for {filename}: {e}")
             formatted_result = f"{filename} : [Analysis failed due to API error: {e}]"
-            analysis_results.append(formatted_result)
-            
-    print("[INFO] Batch analysis complete.")
-    return analysis_results
+            yield formatted_result
 
 
 # --- Main Detection Logic ---
 
+def motion_gray(frame):
+    """Downsamples a BGR frame and converts it to greyscale for motion checks."""
+    small = cv2.resize(frame, MOTION_FRAME_SIZE, interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+
+def three_frame_motion(g0, g1, g2):
+    """
+    Counts pixels that changed both between g0->g1 and g1->g2. Requiring the change
+    in two consecutive diffs filters sensor noise and one-frame flicker.
+    """
+    _, d1 = cv2.threshold(cv2.absdiff(g1, g0), MOTION_PIXEL_THRESHOLD, 1, cv2.THRESH_BINARY)
+    _, d2 = cv2.threshold(cv2.absdiff(g2, g1), MOTION_PIXEL_THRESHOLD, 1, cv2.THRESH_BINARY)
+    return cv2.countNonZero(cv2.bitwise_and(d1, d2))
+
+
 def detect_changes():
     # 1. Setup
     
     # Cleanup routine to delete previous capture images
     if os.path.exists(CAPTURE_FOLDER):
         print(f"[INFO] Cleaning up previous captures in '{CAPTURE_FOLDER}'...")
-        for filename in os.listdir(CAPTURE_FOLDER):
-            file_path = os.path.join(CAPTURE_FOLDER, filename)
-            try:
-                # Check if it's a file before deleting
-                if os.path.isfile(file_path):
-                    os.unlink(file_path)
-            except Exception as e:
-                print(f"[ERROR] Failed to delete {file_path}. Reason: {e}")
+        # Remove the whole folder in one walk; it is recreated right below
+        shutil.rmtree(CAPTURE_FOLDER, ignore_errors=True)
         print("[INFO] Cleanup complete.")
     
     os.makedirs(CAPTURE_FOLDER, exist_ok=True)
     cap = cv2.VideoCapture(CAMERA_INDEX)
+    # Keep only the newest frame in the driver queue so reads are never stale
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    # Compressed MJPG at a modest resolution: ~3x less USB bandwidth than raw YUYV
+    cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*"MJPG"))
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, CAMERA_FRAME_SIZE[0])
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, CAMERA_FRAME_SIZE[1])
     
-    start_time = time.time()
+    start_time = time.monotonic() # Monotonic clock: immune to NTP / wall-clock jumps
     capture_count = 0 
-    last_capture_time = 0 # NEW: Initialize time tracker for cooldown
+    last_capture_time = float('-inf') # NEW: Initialize time tracker for cooldown
+    # Analyze each capture in the background while the camera keeps running
+    analysis_pool = ThreadPoolExecutor(max_workers=GEMINI_CONCURRENCY)
+    pending_analyses = {}
     
     # CRITICAL: Check if the camera opened successfully 
     if not cap.isOpened():
@@ -172,27 +351,55 @@ def detect_changes():
         print("       Check if the device is connected or if another app is using it.")
         print("       Also check system permissions for the camera.")
         write_analysis_report([]) # Save an empty report if we can't start
+        analysis_pool.shutdown()
         return
 
     print(f"[INFO] Starting image capture for {ANALYSIS_DURATION_SECONDS} seconds...")
     
-    # Capture the first frame to initialize 'prev_gray'
+    # Capture the first frame to initialize the differencing ring
     ret, prev = cap.read()
     if not ret:
         print("[FATAL] Error: Could not read the initial frame.")
         cap.release()
         write_analysis_report([])
+        analysis_pool.shutdown()
         return
         
-    prev_gray = cv2.cvtColor(prev, cv2.COLOR_BGR2GRAY)
+    g0 = g1 = motion_gray(prev)
+
+    # JPEG encoding happens off the capture loop; the in-memory bytes go straight to Gemini
+    captured_frames = {}
+    analyzed_hashes = {} # capture name -> dHash, for captures actually sent to Gemini
+
+    def start_analysis(filename, jpeg_bytes, frame_hash):
+        captured_frames[filename] = jpeg_bytes
+        duplicate_of = find_near_duplicate(frame_hash, analyzed_hashes)
+        if duplicate_of:
+            # Same scene as an earlier capture - reuse its Gemini result instead of a new call
+            print(f"[INFO] {filename} matches {duplicate_of}; skipping Gemini call.")
+            pending_analyses[filename] = pending_analyses[duplicate_of]
+            return
+        analyzed_hashes[filename] = frame_hash
+        pending_analyses[filename] = analysis_pool.submit(process_image_with_gemini, jpeg_bytes)
+
+    capture_queue = start_capture_writer(start_analysis)
+
+    # Without a preview window there is no 'q' key; Ctrl+C ends the capture loop instead
+    stop_requested = threading.Event()
+    if HEADLESS:
+        previous_sigint = signal.signal(signal.SIGINT, lambda signum, frame: stop_requested.set())
 
     # 2. Main Capture Loop
     while True:
         # Check time limit
-        elapsed_time = time.time() - start_time
+        now = time.monotonic()
+        elapsed_time = now - start_time
         if elapsed_time > ANALYSIS_DURATION_SECONDS:
             print(f"\n[INFO] {ANALYSIS_DURATION_SECONDS} seconds elapsed. Stopping capture.")
             break
+        if stop_requested.is_set():
+            print("\n[INFO] Interrupt received. Stopping capture.")
+            break
 
         # Read the current frame
         ret, frame = cap.read()
@@ -201,60 +408,72 @@ def detect_changes():
             break
 
         # Motion Detection Logic (Only saves the image, no Gemini call)
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        diff = cv2.absdiff(prev_gray, gray)
-        non_zero = cv2.countNonZero(diff)
+        g2 = motion_gray(frame)
+        non_zero = three_frame_motion(g0, g1, g2)
 
         # Scene change detected
         if non_zero > MOTION_THRESHOLD:  
             
             # Check cooldown period first
-            if (time.time() - last_capture_time) < CAPTURE_COOLDOWN_SECONDS:
+            if (now - last_capture_time) < CAPTURE_COOLDOWN_SECONDS:
                 # Motion detected, but still in cooldown
                 print(f"[{round(elapsed_time, 2)}s] Motion detected, skipping (Cooldown).")
             
             # Check if we have hit the capture limit
             elif capture_count < MAX_CAPTURES:
-                ts = int(time.time())
+                ts = int(time.time()) # Wall-clock time only for the filename
                 filename = os.path.join(CAPTURE_FOLDER, f"frame_{ts}.jpg")
-                cv2.imwrite(filename, frame)
+                capture_queue.put((filename, frame.copy()))
                 
                 # Update counters and time tracker
                 capture_count += 1
-                last_capture_time = time.time()
+                last_capture_time = now
                 
                 # Confirmation that the image was captured, but analysis is deferred
-                print(f"[{round(elapsed_time, 2)}s] Scene change detected → saved {filename} (Analysis Deferred) - Total: {capture_count}/{MAX_CAPTURES}")
+                print(f"[{round(elapsed_time, 2)}s] Scene change detected → queued {filename} (Analysis Starts After Save) - Total: {capture_count}/{MAX_CAPTURES}")
             else:
                 print(f"[{round(elapsed_time, 2)}s] Scene change detected, but capture limit ({MAX_CAPTURES}) reached. Skipping capture.")
 
 
-        prev_gray = gray
+        g0, g1 = g1, g2
+
+        if HEADLESS:
+            continue
 
         # Show live feed and time remaining
         remaining_time = ANALYSIS_DURATION_SECONDS - elapsed_time
-        display_frame = frame.copy()
         
-        # Add text to the frame
+        # Add text to the frame (safe: captures were queued as copies, motion used g2)
         text = f"Time Left: {remaining_time:.1f}s | Captures: {capture_count}/{MAX_CAPTURES} | Press 'q' to Quit"
-        cv2.putText(display_frame, text, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+        cv2.putText(frame, text, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
         
-        cv2.imshow("Live Object Detector", display_frame)
+        cv2.imshow("Live Object Detector", frame)
         
-        if cv2.waitKey(1) & 0xFF == ord('q'):
+        if cv2.waitKey(PREVIEW_FRAME_MS) & 0xFF == ord('q'):
             print("\n[INFO] User quit detected.")
             break
 
     # 3. Cleanup Camera
     cap.release()
-    cv2.destroyAllWindows()
+    if HEADLESS:
+        signal.signal(signal.SIGINT, previous_sigint)
+    else:
+        cv2.destroyAllWindows()
     
-    # 4. Process Saved Captures (Run the heavy work now)
-    final_analysis_results = process_saved_captures(CAPTURE_FOLDER)
+    # Wait for queued captures to finish encoding
+    capture_queue.join()
+    capture_queue.put(None)
     
-    # 5. Save Final Report
-    write_analysis_report(final_analysis_results)
+    # 4. Process Saved Captures (most Gemini calls already finished during capture)
+    # 5. Save Final Report, one line per capture as its analysis finishes
+    write_analysis_report(process_saved_captures(CAPTURE_FOLDER, pending_analyses, captured_frames))
+    analysis_pool.shutdown()
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Live change detector with Gemini object analysis")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore cached Gemini replies and call the API for every capture")
+    args = parser.parse_args()
+    if args.no_cache:
+        gemini_ACCESS.GEMINI_CACHE_ENABLED = False
     detect_changes()
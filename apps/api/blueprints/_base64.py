@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+Chunked base64 decoding for the blueprints
+Large uploads are decoded a slice at a time instead of b64decode first copying the
+whole string to ASCII bytes
+"""
+
+import base64
+import re
+
+# Base64 text is read in slices of this many characters
+BASE64_CHUNK_CHARS = 64 * 1024
+
+# b64decode discards characters outside the alphabet (e.g. MIME line breaks); so does each slice
+_NON_BASE64_RE = re.compile(r'[^A-Za-z0-9+/=]+')
+
+def iter_base64_chunks(text):
+    """Yield the decoded bytes of base64 text one slice at a time"""
+    carry = ''
+    for start in range(0, len(text), BASE64_CHUNK_CHARS):
+        piece = carry + _NON_BASE64_RE.sub('', text[start:start + BASE64_CHUNK_CHARS])
+        # Only whole 4-character groups decode on their own; the rest waits for the next slice
+        usable = len(piece) - len(piece) % 4
+        if usable:
+            yield base64.b64decode(piece[:usable])
+        carry = piece[usable:]
+    if carry:
+        # Truncated input raises binascii.Error here, as a single b64decode would
+        yield base64.b64decode(carry)
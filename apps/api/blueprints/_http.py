@@ -0,0 +1,17 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP session for the blueprints
+One keep-alive connection pool per process, with retries on transient gateway errors
+"""
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Idempotent requests only (urllib3's default allowed_methods), so a POST is never sent twice
+_retry = Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+_adapter = HTTPAdapter(max_retries=_retry, pool_connections=32, pool_maxsize=64)
+
+SESSION = requests.Session()
+SESSION.mount('http://', _adapter)
+SESSION.mount('https://', _adapter)
@@ -6,11 +6,13 @@ Imports and wraps agent system classes from decluttered_api.py
 
 import sys
 import os
-import asyncio
+import concurrent.futures
 from datetime import datetime
 
 # Add parent directory to path to import decluttered_api.py
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if API_DIR not in sys.path:
+    sys.path.insert(0, API_DIR)
 
 from flask import Blueprint, request, jsonify
 
@@ -20,6 +22,8 @@ try:
         DeclutteredAgentSystem,
         NegotiatorAgent,
         VoiceAssistantAgent,
+        create_agents,
+        run_async,
         AGENTMAIL_AVAILABLE,
         LIVEKIT_AVAILABLE,
         GEMINI_AVAILABLE
@@ -30,6 +34,8 @@ except ImportError as e:
     DeclutteredAgentSystem = None
     NegotiatorAgent = None
     VoiceAssistantAgent = None
+    create_agents = None
+    run_async = None
     AGENTMAIL_AVAILABLE = False
     LIVEKIT_AVAILABLE = False
     GEMINI_AVAILABLE = False
@@ -47,13 +53,8 @@ def get_agent_system():
     global agent_system_instance, negotiator_instance, voice_assistant_instance
     
     if agent_system_instance is None and DeclutteredAgentSystem is not None:
-        agent_system_instance = DeclutteredAgentSystem()
-        
-        if NegotiatorAgent is not None:
-            negotiator_instance = NegotiatorAgent(agent_system_instance)
-        
-        if VoiceAssistantAgent is not None:
-            voice_assistant_instance = VoiceAssistantAgent(agent_system_instance)
+        # Built on decluttered_api's shared agent loop, which also runs every request coroutine
+        agent_system_instance, negotiator_instance, voice_assistant_instance = run_async(create_agents(), timeout=None)
     
     return agent_system_instance, negotiator_instance, voice_assistant_instance
 
@@ -136,7 +137,7 @@ def agentmail_webhook():
         recipient = email_data.get('to', '')
         
         if 'negotiations@' in recipient:
-            result = asyncio.run(negotiator.process_buyer_email(email_data))
+            result = run_async(negotiator.process_buyer_email(email_data))
         else:
             result = {'ok': False, 'error': 'Unknown recipient'}
         
@@ -157,7 +158,7 @@ def create_voice_session():
         data = request.get_json()
         room_name = data.get('room_name', f'voice_session_{int(datetime.now().timestamp())}')
         
-        result = asyncio.run(voice_assistant.create_voice_session(room_name))
+        result = run_async(voice_assistant.create_voice_session(room_name))
         
         return jsonify({
             'ok': result.get('success', False),
@@ -180,7 +181,7 @@ def voice_query():
         query = data.get('query', '')
         user_id = data.get('user_id', 'user_12345')  # Mock user
         
-        result = asyncio.run(voice_assistant.process_voice_query(query, user_id))
+        result = run_async(voice_assistant.process_voice_query(query, user_id))
         
         return jsonify({
             'ok': True,
@@ -199,14 +200,20 @@ def get_demo_data():
         if not agent_system or not agent_system.supabase:
             return jsonify({'ok': False, 'error': 'Database not connected'})
         
-        # Get recent communications
-        comms = agent_system.supabase.table('agent_communications').select('*').order('created_at', desc=True).limit(5).execute()
-        
-        # Get recent voice interactions  
-        voice = agent_system.supabase.table('voice_interactions').select('*').order('created_at', desc=True).limit(5).execute()
-        
-        # Get market intelligence
-        intel = agent_system.supabase.table('agent_market_intelligence').select('*').order('confidence_score', desc=True).limit(3).execute()
+        supabase = agent_system.supabase
+        
+        # The three queries are independent, so run them concurrently
+        with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
+            # Get recent communications
+            comms_future = executor.submit(supabase.table('agent_communications').select('*').order('created_at', desc=True).limit(5).execute)
+            
+            # Get recent voice interactions  
+            voice_future = executor.submit(supabase.table('voice_interactions').select('*').order('created_at', desc=True).limit(5).execute)
+            
+            # Get market intelligence
+            intel_future = executor.submit(supabase.table('agent_market_intelligence').select('*').order('confidence_score', desc=True).limit(3).execute)
+            
+            comms, voice, intel = comms_future.result(), voice_future.result(), intel_future.result()
         
         return jsonify({
             'ok': True,
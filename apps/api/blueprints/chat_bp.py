@@ -1,8 +1,22 @@
 from flask import Blueprint, request, jsonify, Response
 import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
 import os
 import logging
 import json
+import random
+import time
+import functools
+import hashlib
+import threading
+from datetime import datetime, timedelta
+
+# Explicit context caching (newer google-generativeai releases only)
+try:
+    from google.generativeai import caching
+    CONTEXT_CACHING_AVAILABLE = True
+except ImportError:
+    CONTEXT_CACHING_AVAILABLE = False
 
 chat_bp = Blueprint('chat_bp', __name__, url_prefix='/api/chat')
 logger = logging.getLogger(__name__)
@@ -12,6 +26,151 @@ GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY')
 if GEMINI_API_KEY:
     genai.configure(api_key=GEMINI_API_KEY)
 
+# Rate-limit / transient errors are retried with exponential backoff; others fail fast
+RETRYABLE_GEMINI_ERRORS = (
+    google_exceptions.ResourceExhausted,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.DeadlineExceeded,
+)
+GEMINI_MAX_RETRIES = 3
+GEMINI_BACKOFF_BASE_SECONDS = 1.0
+
+def call_with_backoff(fn, *args, **kwargs):
+    """Call a Gemini SDK function, retrying transient errors with exponential backoff + jitter"""
+    for attempt in range(GEMINI_MAX_RETRIES + 1):
+        try:
+            return fn(*args, **kwargs)
+        except RETRYABLE_GEMINI_ERRORS as e:
+            if attempt == GEMINI_MAX_RETRIES:
+                raise
+            delay = GEMINI_BACKOFF_BASE_SECONDS * 2 ** attempt + random.random()
+            logger.warning(f"Gemini transient error ({type(e).__name__}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+# Stable part of the assistant prompt; the per-user data context is appended after it
+CHAT_INSTRUCTIONS = """You are an expert AI Marketplace Assistant for Decluttered.AI. 
+Your goal is to help users sell their items, analyze their sales performance, and provide pricing advice.
+
+Instructions:
+1. Answer the user's question based on the provided context.
+2. Be encouraging, professional, and data-driven.
+3. If the user asks about pricing, refer to specific items in their listings.
+4. If the user asks about trends, use your general knowledge combined with their specific category performance.
+5. Keep responses concise and actionable. Use formatting like bolding and bullet points.
+"""
+
+CONTEXT_CACHE_TTL = timedelta(minutes=10)
+# Gemini refuses explicit caches below this many input tokens; prompts are sized at
+# ~4 characters per token so short ones skip the create round trip entirely
+CONTEXT_CACHE_MIN_TOKENS = 4096
+CHARS_PER_TOKEN = 4
+# (model, session_id) -> (sha256 of the context, CachedContent or None if refused, expires_at)
+_context_caches = {}
+_context_caches_lock = threading.Lock()
+
+def delete_context_cache(cache):
+    """Drop a replaced cache on the server instead of letting it wait out its TTL"""
+    def delete():
+        try:
+            cache.delete()
+        except Exception as e:
+            logger.info(f"Could not delete context cache: {e}")
+    threading.Thread(target=delete, daemon=True).start()
+
+def get_cached_chat_model(model_name, session_id, context_block):
+    """
+    Return a model backed by a Gemini context cache holding the instructions + this
+    session's context, so later turns of the session don't resend those input tokens.
+    Returns None when caching is unavailable (old SDK, no session id, prompt below the
+    minimum cacheable size, or the create call was refused).
+    """
+    if not CONTEXT_CACHING_AVAILABLE or not session_id:
+        return None
+    
+    system_instruction = f"{CHAT_INSTRUCTIONS}\n{context_block}"
+    if len(system_instruction) < CONTEXT_CACHE_MIN_TOKENS * CHARS_PER_TOKEN:
+        return None
+    
+    key = (model_name, session_id)
+    digest = hashlib.sha256(context_block.encode('utf-8')).hexdigest()
+    now = datetime.now()
+    with _context_caches_lock:
+        entry = _context_caches.get(key)
+        if entry and entry[0] == digest and entry[2] > now:
+            cache = entry[1]
+            return genai.GenerativeModel.from_cached_content(cached_content=cache) if cache else None
+        # Expired caches are already gone on the server
+        for stale_key in [k for k, (_, _, expires_at) in _context_caches.items() if expires_at <= now]:
+            del _context_caches[stale_key]
+    
+    try:
+        cache = caching.CachedContent.create(
+            model=f"models/{model_name}",
+            system_instruction=system_instruction,
+            ttl=CONTEXT_CACHE_TTL,
+        )
+    except Exception as e:
+        # Remember the refusal for this session's context so we don't retry it every turn
+        logger.info(f"Context caching unavailable for {model_name}, sending prompt inline: {e}")
+        cache = None
+    
+    with _context_caches_lock:
+        previous = _context_caches.get(key)
+        # Expire locally a little before the server does
+        _context_caches[key] = (digest, cache, now + CONTEXT_CACHE_TTL - timedelta(seconds=30))
+    # The session's data changed (or a concurrent turn created one too); drop the old cache
+    if previous and previous[1] is not None and previous[1] is not cache:
+        delete_context_cache(previous[1])
+    
+    if cache is None:
+        return None
+    return genai.GenerativeModel.from_cached_content(cached_content=cache)
+
+def serialize_context(context):
+    """Compact JSON for the prompt (no indentation - whitespace only costs tokens)"""
+    return json.dumps(context, separators=(',', ':'))
+
+@functools.lru_cache(maxsize=32)
+def get_model(model_name, system_instruction=None):
+    """
+    Return a cached GenerativeModel; models hold only configuration, so reuse is safe.
+    Pass only static instructions - per-user data belongs in the request, not the cache key.
+    """
+    return genai.GenerativeModel(model_name, system_instruction=system_instruction)
+
+# Model names that support generateContent, discovered once via list_models()
+_available_models = None
+
+def available_models(models_to_try):
+    """
+    Drop fallback names this API key cannot use, so a cold request doesn't spend a
+    failed call on each one. Keeps the full list if discovery fails.
+    """
+    global _available_models
+    if _available_models is None:
+        try:
+            _available_models = frozenset(
+                m.name.split('/')[-1] for m in genai.list_models()
+                if 'generateContent' in m.supported_generation_methods
+            )
+        except Exception as e:
+            logger.warning(f"Could not list Gemini models, trying every fallback: {e}")
+            return models_to_try
+    
+    usable = [m for m in models_to_try if m in _available_models]
+    return usable or models_to_try
+
+# Last model name that succeeded per endpoint, tried first on the next request
+_preferred_models = {}
+
+def models_in_preferred_order(endpoint, models_to_try):
+    """Put the endpoint's last successful model first so the fallback probe is usually skipped"""
+    models_to_try = available_models(models_to_try)
+    preferred = _preferred_models.get(endpoint)
+    if preferred not in models_to_try:
+        return models_to_try
+    return [preferred] + [m for m in models_to_try if m != preferred]
+
 @chat_bp.route('/message', methods=['POST'])
 def chat_message():
     if not GEMINI_API_KEY:
@@ -22,28 +181,20 @@ def chat_message():
         user_message = data.get('message')
         context = data.get('context', {})
         history = data.get('history', [])
+        # Chat session id from the frontend; context caches are scoped to it
+        session_id = request.headers.get('X-Session-Id') or data.get('session_id')
         
         if not user_message:
             return jsonify({'error': 'Message is required'}), 400
 
-        # Construct the system prompt with context
-        system_prompt = f"""You are an expert AI Marketplace Assistant for Decluttered.AI. 
-Your goal is to help users sell their items, analyze their sales performance, and provide pricing advice.
-
-Here is the user's current data context:
+        # Per-user data context; the stable instructions live in CHAT_INSTRUCTIONS
+        context_block = f"""Here is the user's current data context:
 - Active Listings: {len([l for l in context.get('recentListings', []) if l.get('status') == 'active'])}
 - Total Revenue: ${context.get('analytics', {}).get('totalRevenue', 0)}
 - Recent Sales: {len(context.get('salesHistory', []))}
 
 Detailed Context:
-{json.dumps(context, indent=2)}
-
-Instructions:
-1. Answer the user's question based on the provided context.
-2. Be encouraging, professional, and data-driven.
-3. If the user asks about pricing, refer to specific items in their listings.
-4. If the user asks about trends, use your general knowledge combined with their specific category performance.
-5. Keep responses concise and actionable. Use formatting like bolding and bullet points.
+{serialize_context(context)}
 """
 
         # Initialize model with robust fallback
@@ -58,11 +209,18 @@ Instructions:
         response = None
         last_error = None
         
-        for model_name in models_to_try:
+        for model_name in models_in_preferred_order('chat', models_to_try):
             try:
-                model = genai.GenerativeModel(model_name, system_instruction=system_prompt)
+                model = get_cached_chat_model(model_name, session_id, context_block)
+                message = user_message
+                if model is None:
+                    # Instructions-only model (shared across users); this turn carries the data context
+                    model = get_model(model_name, CHAT_INSTRUCTIONS)
+                    message = f"{context_block}\nUser question: {user_message}"
                 chat = model.start_chat(history=history)
-                response = chat.send_message(user_message)
+                # stream=True returns as soon as the first chunk is ready
+                response = call_with_backoff(chat.send_message, message, stream=True)
+                _preferred_models['chat'] = model_name
                 logger.info(f"Successfully used model: {model_name}")
                 break
             except Exception as e:
@@ -72,7 +230,7 @@ Instructions:
         if not response:
             raise last_error or Exception("No valid model found")
         
-        # Stream the response
+        # Relay chunks to the client as Gemini emits them
         def generate():
             for chunk in response:
                 if chunk.text:
@@ -105,7 +263,7 @@ def generate_draft():
         - Current Offer: ${offer_amount}
         
         Last few messages:
-        {json.dumps(message_history[-3:], indent=2)}
+        {json.dumps(message_history[-3:], separators=(',', ':'))}
         
         Task:
         Generate a polite, professional, and concise draft response for the seller to send to the buyer.
@@ -126,11 +284,12 @@ def generate_draft():
         response_text = None
         last_error = None
         
-        for model_name in models_to_try:
+        for model_name in models_in_preferred_order('draft', models_to_try):
             try:
-                model = genai.GenerativeModel(model_name)
-                response = model.generate_content(prompt)
+                model = get_model(model_name)
+                response = call_with_backoff(model.generate_content, prompt)
                 response_text = response.text.strip()
+                _preferred_models['draft'] = model_name
                 logger.info(f"Successfully generated draft using model: {model_name}")
                 break
             except Exception as e:
@@ -1,52 +1,118 @@
 #!/usr/bin/env python3
 """
 eBay API Blueprint
-Imports and wraps the EbayAutomatorImproved from ebay_improved.py
+Thin alias over the listing blueprint: eBay listings go through the shared
+MarketplaceLister instead of a second automator of its own
 """
 
 import sys
-import os
+import traceback
 from datetime import datetime
+from pathlib import Path
 
-# Add parent directory to path to import ebay_improved.py
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import numpy as np
 
-from flask import Blueprint, request, jsonify
+# Add parent directory to path to import listing.py
+API_DIR = str(Path(__file__).resolve().parents[1])
+if API_DIR not in sys.path:
+    sys.path.insert(0, API_DIR)
 
-# Import the eBay class from ebay_improved.py
+from flask import Blueprint, request, jsonify, g
+
+# Reuse the listing blueprint's lister singleton (one instance, one browser) and its helpers
+from blueprints.listing_bp import get_listing_instance, get_request_json, prebuilt_error, cache_health
+
+# Optional: compile the median with Numba
 try:
-    from ebay_improved import EbayAutomatorImproved
-    print("[OK] Imported EbayAutomatorImproved from ebay_improved.py")
-except ImportError as e:
-    print(f"[ERROR] Failed to import from ebay_improved.py: {e}")
-    EbayAutomatorImproved = None
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+def median_price(prices):
+    """Median of a non-empty float64 array via O(n) quickselect instead of a full sort"""
+    k = prices.size // 2
+    part = np.partition(prices, k)
+    if prices.size % 2:
+        return part[k]
+    # Everything left of k is <= part[k], so the lower middle value is their max
+    return 0.5 * (part[k] + part[:k].max())
+
+if NUMBA_AVAILABLE:
+    # Explicit signature compiles at import (cached on disk) rather than on the first request
+    median_price = njit('float64(float64[:])', cache=True)(median_price)
+
+def calculate_optimal_price(pricing_data: dict, condition: str = "used") -> float:
+    """Median comp price for the condition (all comps if none match); 50.0 without data"""
+    try:
+        comps = pricing_data.get('comps', [])
+        if not comps:
+            return 50.0
+        
+        # One pass over the comps, bucketing prices for this condition and for all conditions
+        condition_prices = []
+        all_prices = []
+        for comp in comps:
+            price = comp.get('price')
+            if not price:
+                continue
+            price = float(price)
+            all_prices.append(price)
+            if comp['condition'] == condition:
+                condition_prices.append(price)
+        
+        prices = np.array(condition_prices or all_prices, dtype=np.float64)
+        if not prices.size:
+            return 50.0
+        
+        return round(float(median_price(prices)), 2)
+    except Exception as e:
+        print(f"❌ Price calculation error: {e}")
+        return 50.0
+
+ERR_NOT_INITIALIZED = prebuilt_error({'ok': False, 'error': 'eBay API not initialized'}, 500)
+ERR_INVALID_REQUEST = prebuilt_error({'ok': False, 'error_code': 'INVALID_REQUEST', 'message': 'JSON request body required'}, 400)
+ERR_MISSING_DATA = prebuilt_error({'ok': False, 'error_code': 'MISSING_DATA', 'message': 'Product and pricing data required'}, 400)
 
 # Create blueprint
 ebay_bp = Blueprint('ebay', __name__, url_prefix='/api/ebay')
 
-# Initialize eBay instance (singleton pattern)
-ebay_instance = None
-
-def get_ebay_instance():
-    """Get or create eBay instance"""
-    global ebay_instance
-    if ebay_instance is None and EbayAutomatorImproved is not None:
-        ebay_instance = EbayAutomatorImproved()
-    return ebay_instance
+@ebay_bp.before_request
+def validate_listing_request():
+    """Reject malformed /listing bodies before the view runs"""
+    if request.endpoint != 'ebay.create_ebay_listing':
+        return None
+    
+    if not request.is_json:
+        return ERR_INVALID_REQUEST()
+    
+    try:
+        data = get_request_json()
+    except Exception:
+        return ERR_INVALID_REQUEST()
+    if not isinstance(data, dict):
+        return ERR_INVALID_REQUEST()
+    
+    if 'product' not in data or 'pricing_data' not in data:
+        return ERR_MISSING_DATA()
+    
+    g.listing_json = data
+    return None
 
 # Blueprint routes
 @ebay_bp.route('/health', methods=['GET'])
+@cache_health
 def health():
     """Health check for eBay service"""
     try:
-        automator = get_ebay_instance()
+        lister = get_listing_instance()
         return jsonify({
             'status': 'OK',
             'service': 'ebay_listing_automation_improved',
             'timestamp': datetime.now().isoformat(),
-            'browser_ready': automator.driver is not None if automator else False,
-            'ebay_logged_in': automator.ebay_logged_in if automator else False,
-            'gemini_available': automator.gemini_model is not None if automator else False,
+            'browser_ready': lister.driver is not None if lister else False,
+            'ebay_configured': bool(lister.ebay_config['app_id']) if lister else False,
+            'gemini_available': lister.gemini_model is not None if lister else False,
             'version': '2.0.0 - IMPROVED'
         })
     except Exception as e:
@@ -60,65 +126,35 @@ def health():
 
 @ebay_bp.route('/listing', methods=['POST'])
 def create_ebay_listing():
-    """Create eBay listing using improved method"""
+    """Create eBay listing through the shared MarketplaceLister"""
     try:
-        automator = get_ebay_instance()
-        if not automator:
-            return jsonify({'ok': False, 'error': 'eBay API not initialized'}), 500
-        
-        if not request.is_json:
-            return jsonify({
-                'ok': False,
-                'error_code': 'INVALID_REQUEST',
-                'message': 'JSON request body required'
-            }), 400
-        
-        data = request.get_json()
+        lister = get_listing_instance()
+        if not lister:
+            return ERR_NOT_INITIALIZED()
         
-        if 'product' not in data or 'pricing_data' not in data:
-            return jsonify({
-                'ok': False,
-                'error_code': 'MISSING_DATA',
-                'message': 'Product and pricing data required'
-            }), 400
+        # Body was parsed and validated in validate_listing_request
+        data = g.listing_json
         
         product_data = data['product']
         pricing_data = data['pricing_data']
         
-        # Calculate optimal price
-        def calculate_optimal_price(pricing_data: dict, condition: str = "used") -> float:
-            try:
-                comps = pricing_data.get('comps', [])
-                if not comps:
-                    return 50.0
-                
-                condition_comps = [comp for comp in comps if comp['condition'] == condition]
-                if not condition_comps:
-                    condition_comps = comps
-                
-                prices = [float(comp['price']) for comp in condition_comps if comp.get('price')]
-                if not prices:
-                    return 50.0
-                
-                from statistics import median
-                return round(median(prices), 2)
-            except Exception as e:
-                print(f"❌ Price calculation error: {e}")
-                return 50.0
+        # Use the caller's price when the pipeline already chose one
+        supplied_price = product_data.get('price')
+        price = float(supplied_price) if supplied_price else calculate_optimal_price(pricing_data, product_data.get('condition', 'used'))
         
         # Prepare listing data
         listing_data = {
             'title': product_data.get('name', 'Item for Sale'),
             'category': product_data.get('category', 'Other'),
             'condition': product_data.get('condition', 'used'),
-            'price': calculate_optimal_price(pricing_data, product_data.get('condition', 'used')),
+            'price': price,
             'quantity': 1,
             'description': product_data.get('description', ''),
             'images': data.get('images', [])
         }
         
         # Create the listing
-        result = automator.create_listing(listing_data)
+        result = lister.create_ebay_listing(listing_data)
         
         return jsonify({
             'ok': True,
@@ -128,7 +164,6 @@ def create_ebay_listing():
         
     except Exception as e:
         print(f"❌ eBay listing error: {e}")
-        import traceback
         traceback.print_exc()
         return jsonify({
             'ok': False,
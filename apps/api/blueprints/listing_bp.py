@@ -6,12 +6,23 @@ Imports and wraps the MarketplaceLister from listing.py
 
 import sys
 import os
+import json
+import time
+import logging
+import base64
+import tempfile
+import functools
+import threading
+import traceback
 from datetime import datetime
+from pathlib import Path
 
 # Add parent directory to path to import listing.py
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+API_DIR = str(Path(__file__).resolve().parents[1])
+if API_DIR not in sys.path:
+    sys.path.insert(0, API_DIR)
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, g
 
 # Import the listing class from listing.py
 try:
@@ -21,21 +32,164 @@ except ImportError as e:
     print(f"[ERROR] Failed to import from listing.py: {e}")
     MarketplaceLister = None
 
+# Optional: orjson parses large base64 image payloads several times faster than json
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+def get_request_json():
+    """Parse the JSON request body, with orjson when available"""
+    if ORJSON_AVAILABLE and request.is_json:
+        return orjson.loads(request.get_data(cache=False))
+    return request.get_json()
+
+# MarketplaceLister.create_listings uploads only the first image, so only that one is decoded
+LISTING_IMAGES_USED = 1
+
+def stash_images(images):
+    """
+    Decode the base64 images the lister uses (optionally data: URLs) into temp JPEG files
+    and return their paths, so the decoded bytes don't sit on the heap during the Selenium
+    run. Raises ValueError (binascii.Error included) for anything but a list of base64 strings.
+    """
+    if not isinstance(images, list) or not all(isinstance(img_data, str) for img_data in images):
+        raise ValueError('images must be a list of base64 strings')
+    
+    paths = []
+    try:
+        for img_data in images[:LISTING_IMAGES_USED]:
+            if ',' in img_data:
+                img_data = img_data.split(',', 1)[1]
+            decoded = base64.b64decode(img_data)
+            fd, path = tempfile.mkstemp(suffix='.jpg')
+            paths.append(path)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(decoded)
+    except Exception:
+        remove_files(paths)
+        raise
+    return paths
+
+def remove_files(paths):
+    """Best-effort cleanup of stashed temp images"""
+    for path in paths:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+# Image-carrying requests over this size are rejected before the body is read
+# (matches the unified app's MAX_CONTENT_LENGTH)
+MAX_LISTING_BODY_BYTES = 16 * 1024 * 1024
+
+# Platforms a listing can be created on, and the error shown when none are requested
+VALID_PLATFORMS = frozenset(('facebook', 'ebay'))
+NO_VALID_PLATFORMS_MESSAGE = "Valid platforms are: ['facebook', 'ebay']"
+
+def prebuilt_error(payload, status):
+    """Serialize an invariant error body once; each call wraps it in a fresh Response"""
+    body = json.dumps(payload, separators=(',', ':')).encode()
+    return lambda: Response(body, status=status, mimetype='application/json')
+
+ERR_NOT_INITIALIZED = prebuilt_error({'ok': False, 'error': 'Listing API not initialized'}, 500)
+ERR_INVALID_REQUEST = prebuilt_error({'ok': False, 'error_code': 'INVALID_REQUEST', 'message': 'JSON request body required'}, 400)
+ERR_MISSING_PRODUCT_DATA = prebuilt_error({'ok': False, 'error_code': 'MISSING_PRODUCT_DATA', 'message': 'Product data is required'}, 400)
+ERR_MISSING_PRICING_DATA = prebuilt_error({'ok': False, 'error_code': 'MISSING_PRICING_DATA', 'message': 'Pricing data is required'}, 400)
+ERR_NO_VALID_PLATFORMS = prebuilt_error({'ok': False, 'error_code': 'NO_VALID_PLATFORMS', 'message': NO_VALID_PLATFORMS_MESSAGE}, 400)
+ERR_BODY_TOO_LARGE = prebuilt_error({'ok': False, 'error_code': 'PAYLOAD_TOO_LARGE', 'message': 'Request body exceeds 16MB'}, 413)
+ERR_INVALID_IMAGES = prebuilt_error({'ok': False, 'error_code': 'INVALID_IMAGES', 'message': 'images must be a list of base64 strings'}, 400)
+ERR_MISSING_REPLY_FIELDS = prebuilt_error({'ok': False, 'error': 'Missing buyer_name or message'}, 400)
+
 # Create blueprint
 listing_bp = Blueprint('listing', __name__, url_prefix='/api/listing')
+# Request tracing goes through logging at DEBUG; print() would contend on stdout under load
+logger = logging.getLogger(__name__)
 
 # Initialize listing instance (singleton pattern)
 listing_instance = None
+_instance_lock = threading.Lock()
 
 def get_listing_instance():
     """Get or create listing instance"""
     global listing_instance
     if listing_instance is None and MarketplaceLister is not None:
-        listing_instance = MarketplaceLister()
+        # Double-checked so concurrent first requests build only one instance
+        with _instance_lock:
+            if listing_instance is None:
+                listing_instance = MarketplaceLister()
     return listing_instance
 
+@listing_bp.record_once
+def warm_listing_instance(state):
+    """Build the listing instance (Gemini setup) at startup, off the first request's path"""
+    if MarketplaceLister is not None and state.app.config.get('WARM_UP_ON_START', True):
+        threading.Thread(target=get_listing_instance, daemon=True).start()
+
+def require_lister(view):
+    """Resolve the lister once and pass it to the view; 500 if it is not available"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        try:
+            lister = get_listing_instance()
+        except Exception as e:
+            return jsonify({'ok': False, 'error': str(e)}), 500
+        if not lister:
+            return ERR_NOT_INITIALIZED()
+        return view(lister, *args, **kwargs)
+    return wrapper
+
+# Probes may poll /health several times a second; reuse the body for this long
+HEALTH_CACHE_SECONDS = 1.0
+
+def cache_health(view):
+    """Serve the view's last health JSON until it is HEALTH_CACHE_SECONDS old"""
+    # Per decorated view, so the listing and eBay health checks each keep their own body
+    cached = {'expires_at': 0.0, 'body': None}
+    
+    @functools.wraps(view)
+    def wrapper():
+        now = time.monotonic()
+        if cached['body'] is None or now >= cached['expires_at']:
+            cached['body'] = view().get_data()
+            cached['expires_at'] = now + HEALTH_CACHE_SECONDS
+        return Response(cached['body'], mimetype='application/json',
+                        headers={'Cache-Control': f'max-age={int(HEALTH_CACHE_SECONDS)}'})
+    return wrapper
+
+@listing_bp.before_request
+def validate_create_request():
+    """Reject malformed /create bodies before the view (and lister lookup) runs"""
+    if request.endpoint != 'listing.create_listings':
+        return None
+    
+    if request.content_length and request.content_length > MAX_LISTING_BODY_BYTES:
+        return ERR_BODY_TOO_LARGE()
+    
+    if not request.is_json:
+        return ERR_INVALID_REQUEST()
+    
+    try:
+        data = get_request_json()
+    except Exception:
+        return ERR_INVALID_REQUEST()
+    if not isinstance(data, dict):
+        return ERR_INVALID_REQUEST()
+    
+    # Validate required fields
+    if 'product' not in data:
+        return ERR_MISSING_PRODUCT_DATA()
+    
+    if 'pricing_data' not in data:
+        return ERR_MISSING_PRICING_DATA()
+    
+    g.listing_json = data
+    return None
+
 # Blueprint routes
 @listing_bp.route('/health', methods=['GET'])
+@cache_health
 def health():
     """Health check for listing service"""
     try:
@@ -60,13 +214,10 @@ def health():
         })
 
 @listing_bp.route('/facebook/login', methods=['POST'])
-def facebook_login():
+@require_lister
+def facebook_login(lister):
     """Trigger Facebook login process"""
     try:
-        lister = get_listing_instance()
-        if not lister:
-            return jsonify({'ok': False, 'error': 'Listing API not initialized'}), 500
-        
         success = lister.ensure_facebook_access()
         
         if success:
@@ -90,7 +241,8 @@ def facebook_login():
         }), 500
 
 @listing_bp.route('/create', methods=['POST'])
-def create_listings():
+@require_lister
+def create_listings(lister):
     """
     Create marketplace listings
     
@@ -99,56 +251,33 @@ def create_listings():
         "product": {"name": "...", "condition": "used", "category": "..."},
         "pricing_data": {pricing data from price scraper},
         "platforms": ["facebook", "ebay"],
-        "images": ["base64_image_data"] // optional
+        "images": ["base64_image_data"] // optional, decoded to temp files before listing
     }
     """
     try:
-        lister = get_listing_instance()
-        if not lister:
-            return jsonify({'ok': False, 'error': 'Listing API not initialized'}), 500
-        
-        if not request.is_json:
-            return jsonify({
-                'ok': False,
-                'error_code': 'INVALID_REQUEST',
-                'message': 'JSON request body required'
-            }), 400
-        
-        data = request.get_json()
-        
-        # Validate required fields
-        if 'product' not in data:
-            return jsonify({
-                'ok': False,
-                'error_code': 'MISSING_PRODUCT_DATA',
-                'message': 'Product data is required'
-            }), 400
-        
-        if 'pricing_data' not in data:
-            return jsonify({
-                'ok': False,
-                'error_code': 'MISSING_PRICING_DATA',
-                'message': 'Pricing data is required'
-            }), 400
+        # Body was size-checked, parsed and validated in validate_create_request
+        data = g.listing_json
         
         # Extract parameters
         product_data = data['product']
         pricing_data = data['pricing_data']
         platforms = data.get('platforms', ['facebook', 'ebay'])
-        images = data.get('images', [])
         
         # Validate platforms
-        valid_platforms = ['facebook', 'ebay']
-        platforms = [p for p in platforms if p in valid_platforms]
+        platforms = [p for p in platforms if p in VALID_PLATFORMS]
         
         if not platforms:
-            return jsonify({
-                'ok': False,
-                'error_code': 'NO_VALID_PLATFORMS',
-                'message': f'Valid platforms are: {valid_platforms}'
-            }), 400
+            return ERR_NO_VALID_PLATFORMS()
         
-        result = lister.create_listings(product_data, pricing_data, platforms, images)
+        try:
+            image_paths = stash_images(data.pop('images', []))
+        except ValueError:
+            # Wrong shape or undecodable base64 (binascii.Error is a ValueError)
+            return ERR_INVALID_IMAGES()
+        try:
+            result = lister.create_listings(product_data, pricing_data, platforms, image_paths)
+        finally:
+            remove_files(image_paths)
         
         return jsonify({
             'ok': True,
@@ -164,56 +293,59 @@ def create_listings():
         }), 500
 
 @listing_bp.route('/facebook', methods=['POST'])
-def create_facebook_listing():
+@require_lister
+def create_facebook_listing(lister):
     """Create Facebook Marketplace listing directly"""
     try:
-        print("[DEBUG] Received request to /api/listing/facebook")
-        lister = get_listing_instance()
-        if not lister:
-            print("[ERROR] Listing API not initialized")
-            return jsonify({'ok': False, 'error': 'Listing API not initialized'}), 500
+        logger.debug("Received request to /api/listing/facebook")
+        if request.content_length and request.content_length > MAX_LISTING_BODY_BYTES:
+            return ERR_BODY_TOO_LARGE()
         
-        data = request.get_json()
-        print(f"[DEBUG] Request data keys: {data.keys() if data else 'None'}")
+        data = get_request_json()
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Request data keys: %s", list(data.keys()) if data else None)
         
         # Check if this is a full pipeline payload (product + pricing_data)
         if 'product' in data and 'pricing_data' in data:
-            print("[DEBUG] Received full pipeline payload for Facebook listing")
-            result = lister.create_listings(
-                data['product'], 
-                data['pricing_data'], 
-                ['facebook'],
-                data.get('images', [])
-            )
+            logger.debug("Received full pipeline payload for Facebook listing")
+            try:
+                image_paths = stash_images(data.pop('images', []))
+            except ValueError:
+                return ERR_INVALID_IMAGES()
+            try:
+                result = lister.create_listings(
+                    data['product'], 
+                    data['pricing_data'], 
+                    ['facebook'],
+                    image_paths
+                )
+            finally:
+                remove_files(image_paths)
             # Extract just the facebook result
             fb_result = result['listings'].get('facebook', {})
             return jsonify({'ok': True, 'data': fb_result})
             
         # Otherwise assume it's a direct listing payload (title, price, etc.)
-        print("[DEBUG] Received direct listing payload for Facebook")
+        logger.debug("Received direct listing payload for Facebook")
         result = lister.create_facebook_listing(data)
         
         return jsonify({'ok': True, 'data': result})
         
     except Exception as e:
         print(f"❌ Facebook listing error: {e}")
-        import traceback
         traceback.print_exc()
         return jsonify({'ok': False, 'error': str(e)}), 500
 
 @listing_bp.route('/ebay', methods=['POST'])
-def create_ebay_listing():
+@require_lister
+def create_ebay_listing(lister):
     """Create eBay listing directly"""
     try:
-        lister = get_listing_instance()
-        if not lister:
-            return jsonify({'ok': False, 'error': 'Listing API not initialized'}), 500
-        
-        data = request.get_json()
+        data = get_request_json()
         
         # Check if this is a full pipeline payload (product + pricing_data)
         if 'product' in data and 'pricing_data' in data:
-            print("[DEBUG] Received full pipeline payload for eBay listing")
+            logger.debug("Received full pipeline payload for eBay listing")
             result = lister.create_listings(
                 data['product'], 
                 data['pricing_data'], 
@@ -233,13 +365,10 @@ def create_ebay_listing():
         return jsonify({'ok': False, 'error': str(e)}), 500
 
 @listing_bp.route('/facebook/start-monitoring', methods=['POST'])
-def start_monitoring():
+@require_lister
+def start_monitoring(lister):
     """Start monitoring Facebook Marketplace messages"""
     try:
-        lister = get_listing_instance()
-        if not lister:
-            return jsonify({'ok': False, 'error': 'Listing API not initialized'}), 500
-        
         result = lister.start_facebook_message_monitoring()
         
         return jsonify({'ok': True, 'data': result, 'message': 'Monitoring started'})
@@ -249,18 +378,15 @@ def start_monitoring():
         return jsonify({'ok': False, 'error': str(e)}), 500
 
 @listing_bp.route('/facebook/monitor-status', methods=['GET'])
-def monitor_status():
+@require_lister
+def monitor_status(lister):
     """Get Facebook Marketplace monitoring status"""
     try:
-        lister = get_listing_instance()
-        if not lister:
-            return jsonify({'ok': False, 'error': 'Listing API not initialized'}), 500
-        
         # Return monitoring state info
         status = {
             'browser_active': lister.driver is not None,
             'facebook_logged_in': lister.facebook_logged_in,
-            'monitoring_active': hasattr(lister, 'monitor') and lister.monitor is not None and lister.monitor.running
+            'monitoring_active': lister.monitor is not None and lister.monitor.running
         }
         
         return jsonify({'ok': True, 'data': status})
@@ -270,16 +396,13 @@ def monitor_status():
         return jsonify({'ok': False, 'error': str(e)}), 500
 
 @listing_bp.route('/facebook/reply', methods=['POST'])
-def reply_to_message():
+@require_lister
+def reply_to_message(lister):
     """Reply to a Facebook Marketplace message"""
     try:
-        lister = get_listing_instance()
-        if not lister:
-            return jsonify({'ok': False, 'error': 'Listing API not initialized'}), 500
-            
-        data = request.get_json()
+        data = get_request_json()
         if not data or 'buyer_name' not in data or 'message' not in data:
-            return jsonify({'ok': False, 'error': 'Missing buyer_name or message'}), 400
+            return ERR_MISSING_REPLY_FIELDS()
             
         buyer_name = data['buyer_name']
         message = data['message']
@@ -6,12 +6,30 @@ Imports and wraps the ObjectDetectionPipeline from pipeline_api.py
 
 import sys
 import os
+import shutil
+import json
+import time
+import atexit
+import hashlib
+import re
+import uuid
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from urllib.parse import urlsplit
 
 # Add parent directory to path to import pipeline_api.py
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if API_DIR not in sys.path:
+    sys.path.insert(0, API_DIR)
 
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, Response, current_app, request, jsonify, send_from_directory
+from werkzeug.utils import secure_filename
+
+# Process-wide pooled HTTP session, so image downloads reuse keep-alive connections
+from blueprints._base64 import iter_base64_chunks
+from blueprints._http import SESSION
 
 # Import pipeline module
 try:
@@ -19,6 +37,7 @@ try:
     import pipeline_api
     from pipeline_api import (
         initialize_pipeline,
+        warm_pipeline_in_background,
         process_image_async,
         processing_status,
         save_jobs,
@@ -30,17 +49,324 @@ try:
 except ImportError as e:
     print(f"[ERROR] Failed to import from pipeline_api.py: {e}")
     initialize_pipeline = None
+    warm_pipeline_in_background = None
     process_image_async = None
     processing_status = {}
     PIPELINE_AVAILABLE = False
     allowed_file = None
     UPLOAD_FOLDER = 'temp_uploads'
 
+# Optional: Flask-Caching so dashboard polling is served from memory
+try:
+    from flask_caching import Cache
+    FLASK_CACHING_AVAILABLE = True
+except ImportError:
+    FLASK_CACHING_AVAILABLE = False
+
+if FLASK_CACHING_AVAILABLE:
+    cache = Cache(config={'CACHE_TYPE': 'SimpleCache'})
+    cached = cache.cached
+    uncache = cache.delete
+else:
+    cache = None
+    
+    def cached(timeout, key_prefix):
+        return lambda view: view
+    
+    def uncache(key):
+        pass
+
+# Cache keys; these routes take no query arguments, so one key per route is enough
+JOBS_CACHE_KEY = 'pipeline_jobs'
+CROPPED_IMAGES_CACHE_KEY = 'pipeline_cropped_images'
+HEALTH_CACHE_KEY = 'pipeline_health'
+
+# Bounded worker pool for pipeline jobs; extra uploads wait in its queue. Threads, not processes:
+# cv2 decode and YOLO inference release the GIL, and jobs share the loaded model and processing_status.
+# Half the cores leaves room for torch's own intra-op threads and the request threads.
+PIPELINE_WORKERS = int(os.environ.get('PIPELINE_WORKERS', max(1, (os.cpu_count() or 2) // 2)))
+PIPELINE_EXECUTOR = ThreadPoolExecutor(max_workers=PIPELINE_WORKERS, thread_name_prefix='pipeline')
+atexit.register(PIPELINE_EXECUTOR.shutdown, wait=False)
+
+# job_id -> Future, kept apart from processing_status because that dict is saved as JSON
+job_futures = {}
+
+# Extensions listed by /cropped-images (served as JPEG by /cropped-image)
+CROPPED_IMAGE_EXTENSIONS = frozenset({'.jpg', '.jpeg', '.png'})
+
+# Item images given as absolute or scheme-relative URLs
+IMAGE_URL_RE = re.compile(r'^(?:https?:|//)')
+
+# Jobs in these states never change again, so their status can be cached downstream
+TERMINAL_JOB_STATES = frozenset({'completed', 'failed', 'error'})
+TERMINAL_STATUS_MAX_AGE = 300
+
+# Root cropped folder, resolved once at import
+# pipeline_bp.py is in apps/api/blueprints/; we want root/cropped_resellables/
+CROPPED_FOLDER = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))),
+    'cropped_resellables'
+)
+os.makedirs(CROPPED_FOLDER, exist_ok=True)
+
+# Crop names carry a one-second timestamp, so a later run can reuse a name with new content:
+# browsers may keep crops but must revalidate them (ETag/Last-Modified -> 304)
+CROPPED_IMAGE_CACHE_CONTROL = 'no-cache'
+
+# Set DECLUTTER_ACCEL_REDIRECT=1 when the API runs behind nginx configured with
+#     location /_internal/cropped/ { internal; alias /abs/path/to/cropped_resellables/; }
+# so nginx serves crops itself (sendfile, no bytes through the worker)
+ACCEL_REDIRECT_ENABLED = os.environ.get('DECLUTTER_ACCEL_REDIRECT', '0') == '1'
+ACCEL_REDIRECT_PREFIX = os.environ.get('DECLUTTER_ACCEL_REDIRECT_PREFIX', '/_internal/cropped/')
+
+# Largest /process body accepted (matches the app's MAX_CONTENT_LENGTH)
+MAX_UPLOAD_BYTES = 16 * 1024 * 1024
+
+# Uploads are copied to disk in 1 MiB chunks rather than Werkzeug's 16 KiB default
+UPLOAD_BUFFER_SIZE = 1 << 20
+def write_base64_file(image_data, filepath):
+    """Decode base64 text into filepath one slice at a time, never holding all decoded bytes"""
+    try:
+        with open(filepath, 'wb', buffering=UPLOAD_BUFFER_SIZE) as f:
+            for chunk in iter_base64_chunks(image_data):
+                f.write(chunk)
+    except Exception:
+        # Don't leave a half-written upload behind for malformed input
+        try:
+            os.remove(filepath)
+        except OSError:
+            pass
+        raise
+
+IMAGE_DOWNLOAD_WORKERS = 8
+IMAGE_DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+def download_image(url, local_path):
+    """Stream url to local_path; returns local_path, or url itself if the download fails"""
+    partial_path = f"{local_path}.part"
+    try:
+        with SESSION.get(url, timeout=10, stream=True) as response:
+            if response.status_code != 200:
+                print(f"[WARNING] Failed to download image: {response.status_code}")
+                return url
+            with open(partial_path, 'wb') as f:
+                for chunk in response.iter_content(IMAGE_DOWNLOAD_CHUNK_SIZE):
+                    f.write(chunk)
+        # Only complete files appear under the real name
+        os.replace(partial_path, local_path)
+        print(f"[DEBUG] Downloaded image to: {local_path}")
+        return local_path
+    except Exception as e:
+        print(f"[WARNING] Error downloading image: {e}")
+        return url
+
+def resolve_image_paths(items, cropped_folder):
+    """Image path for each item; image URLs map to local crops, downloading missing ones concurrently"""
+    image_paths = []
+    waiting = []    # (item index, local path) for items whose crop must be downloaded
+    downloads = {}  # local path -> url, so a crop shared by several items is fetched once
+    
+    for item in items:
+        image_path = item.get('cropped_path') or item.get('image_url') or None
+        
+        # If image_path is a URL, try to resolve it to a local file
+        if image_path and IMAGE_URL_RE.match(image_path):
+            print(f"[DEBUG] Resolving image URL: {image_path}")
+            # Extract filename (urlsplit drops any query string or fragment)
+            filename = urlsplit(image_path).path.rsplit('/', 1)[-1]
+            
+            local_candidate = os.path.join(cropped_folder, filename)
+            
+            if os.path.exists(local_candidate):
+                print(f"[DEBUG] Found local file for URL: {local_candidate}")
+                image_path = local_candidate
+            else:
+                print(f"[DEBUG] Local file not found at {local_candidate}, downloading...")
+                waiting.append((len(image_paths), local_candidate))
+                downloads.setdefault(local_candidate, image_path)
+        
+        image_paths.append(image_path)
+    
+    if downloads:
+        with ThreadPoolExecutor(max_workers=IMAGE_DOWNLOAD_WORKERS) as pool:
+            futures = {
+                local_path: pool.submit(download_image, url, local_path)
+                for local_path, url in downloads.items()
+            }
+            for index, local_path in waiting:
+                image_paths[index] = futures[local_path].result()
+    
+    return image_paths
+
+# Optional: Redis shares the listing idempotency cache across processes
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+# Long enough to swallow double-clicks and client retries, short enough for price edits to go through
+LISTING_CACHE_TTL_SECONDS = 600
+# Last good result per item, served only when the listing APIs fail and the client sent X-Allow-Stale
+LISTING_STALE_TTL_SECONDS = 24 * 3600
+# A claimed key holds this placeholder while its listing runs; the TTL outlasts a slow Selenium
+# run but frees the key if the worker dies mid-listing
+LISTING_PENDING = '__pending__'
+LISTING_PENDING_TTL_SECONDS = 300
+
+redis_client = None
+if REDIS_AVAILABLE and os.environ.get('REDIS_URL'):
+    try:
+        redis_client = redis.Redis.from_url(os.environ['REDIS_URL'], socket_timeout=1)
+        redis_client.ping()
+        print("[OK] Listing cache using Redis")
+    except Exception as e:
+        print(f"[WARNING] Redis unavailable, listing cache is per-process: {e}")
+        redis_client = None
+
+# In-process fallback: key -> (monotonic expiry time, JSON result)
+LOCAL_LISTING_CACHE_MAX = 1024
+_local_listing_cache = {}
+_local_listing_cache_lock = threading.Lock()
+
+def listing_cache_key(item, platforms, user_id):
+    """Idempotency key for a user listing an item on the given platforms at its price"""
+    try:
+        price = round(float(item.get('price') or item.get('estimated_value') or 0.0), 2)
+    except (TypeError, ValueError):
+        price = 0.0
+    raw = f"{user_id}|{item.get('cropped_id')}|{sorted(platforms)}|{price}"
+    return 'listing:' + hashlib.sha256(raw.encode()).hexdigest()
+
+def listing_succeeded(listing_result):
+    """True when no platform reported an error"""
+    return isinstance(listing_result, dict) and not any(
+        isinstance(result, dict) and 'error' in result for result in listing_result.values()
+    )
+
+def _cache_get(key):
+    if redis_client is not None:
+        try:
+            value = redis_client.get(key)
+            return json.loads(value) if value is not None else None
+        except Exception as e:
+            print(f"[WARNING] Listing cache read failed: {e}")
+            return None
+    with _local_listing_cache_lock:
+        entry = _local_listing_cache.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del _local_listing_cache[key]
+            return None
+        return json.loads(entry[1])
+
+def _local_set(key, body, ttl):
+    """Store in the in-process cache; caller holds _local_listing_cache_lock"""
+    if len(_local_listing_cache) >= LOCAL_LISTING_CACHE_MAX:
+        now = time.monotonic()
+        for stale_key in [k for k, (expires_at, _) in _local_listing_cache.items() if expires_at < now]:
+            del _local_listing_cache[stale_key]
+        while len(_local_listing_cache) >= LOCAL_LISTING_CACHE_MAX:
+            # Dicts keep insertion order, so this drops the oldest entry
+            del _local_listing_cache[next(iter(_local_listing_cache))]
+    _local_listing_cache[key] = (time.monotonic() + ttl, body)
+
+def _cache_set(key, value, ttl):
+    body = json.dumps(value, default=str)
+    if redis_client is not None:
+        try:
+            redis_client.set(key, body, ex=ttl)
+        except Exception as e:
+            print(f"[WARNING] Listing cache write failed: {e}")
+        return
+    with _local_listing_cache_lock:
+        _local_set(key, body, ttl)
+
+def _cache_add(key, value, ttl):
+    """Store value only if key is absent; returns None if stored, else the existing value"""
+    body = json.dumps(value, default=str)
+    if redis_client is not None:
+        try:
+            # SET NX is atomic, so exactly one concurrent caller claims the key
+            for _ in range(2):
+                if redis_client.set(key, body, nx=True, ex=ttl):
+                    return None
+                existing = redis_client.get(key)
+                if existing is not None:
+                    return json.loads(existing)
+                # Expired between the two calls; try to claim it again
+        except Exception as e:
+            print(f"[WARNING] Listing cache claim failed: {e}")
+        return None
+    with _local_listing_cache_lock:
+        entry = _local_listing_cache.get(key)
+        if entry is not None and entry[0] >= time.monotonic():
+            return json.loads(entry[1])
+        _local_set(key, body, ttl)
+        return None
+
+def _cache_delete(key):
+    if redis_client is not None:
+        try:
+            redis_client.delete(key)
+        except Exception as e:
+            print(f"[WARNING] Listing cache delete failed: {e}")
+        return
+    with _local_listing_cache_lock:
+        _local_listing_cache.pop(key, None)
+
+def claim_listing(key):
+    """
+    Reserve key for one listing attempt. Returns None when this caller now owns it;
+    otherwise the stored result, or LISTING_PENDING while another request is listing it.
+    """
+    return _cache_add(key, LISTING_PENDING, LISTING_PENDING_TTL_SECONDS)
+
+def release_listing(key):
+    """Give up a claim after a failed attempt so the item can be retried"""
+    _cache_delete(key)
+
+def get_stale_listing(key):
+    """Last successful listing result for key, kept for LISTING_STALE_TTL_SECONDS, or None"""
+    return _cache_get('stale:' + key)
+
+def set_cached_listing(key, listing_result):
+    """Remember a successful listing result (replacing the claim) for retries and as a stale fallback"""
+    _cache_set(key, listing_result, LISTING_CACHE_TTL_SECONDS)
+    _cache_set('stale:' + key, listing_result, LISTING_STALE_TTL_SECONDS)
+
 # Create blueprint
 pipeline_bp = Blueprint('pipeline', __name__, url_prefix='/api/pipeline')
 
+@pipeline_bp.before_request
+def reject_oversized_upload():
+    """Refuse /process bodies over the upload limit from Content-Length, before parsing any of it"""
+    if request.endpoint != 'pipeline.process_image':
+        return None
+    if request.content_length and request.content_length > MAX_UPLOAD_BYTES:
+        return jsonify({
+            'ok': False,
+            'error_code': 'PAYLOAD_TOO_LARGE',
+            'message': f'Upload exceeds {MAX_UPLOAD_BYTES // (1024 * 1024)}MB'
+        }), 413
+    return None
+
+@pipeline_bp.record_once
+def init_cache(state):
+    """Attach the response cache to the app the blueprint is registered on"""
+    if cache is not None:
+        cache.init_app(state.app)
+
+@pipeline_bp.record_once
+def warm_pipeline(state):
+    """Keep YOLO warm in the API process so the first upload skips model load"""
+    if warm_pipeline_in_background and state.app.config.get('WARM_UP_ON_START', True):
+        warm_pipeline_in_background()
+
 # Blueprint routes
 @pipeline_bp.route('/health', methods=['GET'])
+@cached(timeout=10, key_prefix=HEALTH_CACHE_KEY)
 def health():
     """Health check endpoint"""
     return jsonify({
@@ -79,7 +405,6 @@ def process_image():
             }), 400
         
         # Generate job ID
-        import uuid
         job_id = str(uuid.uuid4())
         
         # Process image in background
@@ -100,10 +425,10 @@ def process_image():
                 }), 400
             
             # Save file temporarily
-            from werkzeug.utils import secure_filename
             filename = secure_filename(image_file.filename)
             filepath = os.path.join(UPLOAD_FOLDER, f"{job_id}_{filename}")
-            image_file.save(filepath)
+            with open(filepath, 'wb', buffering=UPLOAD_BUFFER_SIZE) as dst:
+                shutil.copyfileobj(image_file.stream, dst, length=UPLOAD_BUFFER_SIZE)
             
             # Set initial status
             processing_status[job_id] = {
@@ -112,39 +437,26 @@ def process_image():
                 "message": "Image uploaded, starting processing...",
                 "timestamp": datetime.now().isoformat()
             }
-            save_jobs()
+            save_jobs(job_id)
 
             # Get platforms from request
             platforms = request.form.getlist('platforms')
             if not platforms:
                 platforms = ["facebook", "ebay"]
 
-            # Start background processing
-            import threading
-            thread = threading.Thread(
-                target=process_image_async,
-                args=(filepath, job_id, platforms)
-            )
-            thread.daemon = True
-            thread.start()
+            # Queue background processing
+            job_futures[job_id] = PIPELINE_EXECUTOR.submit(process_image_async, filepath, job_id, platforms)
         
         elif 'image_data' in request.form:
             # Handle base64 image data
             image_data = request.form['image_data']
             
-            # Save base64 to file
-            import base64
-            import tempfile
-            
             # Remove data URL prefix if present
-            if ',' in image_data:
-                image_data = image_data.split(',')[1]
+            image_data = image_data.partition(',')[2] or image_data
             
-            image_bytes = base64.b64decode(image_data)
+            # Save base64 to file
             filepath = os.path.join(UPLOAD_FOLDER, f"{job_id}.jpg")
-            
-            with open(filepath, 'wb') as f:
-                f.write(image_bytes)
+            write_base64_file(image_data, filepath)
             
             # Set initial status
             processing_status[job_id] = {
@@ -153,21 +465,17 @@ def process_image():
                 "message": "Image uploaded, starting processing...",
                 "timestamp": datetime.now().isoformat()
             }
-            save_jobs()
+            save_jobs(job_id)
 
             # Get platforms from request
             platforms = request.form.getlist('platforms')
             if not platforms:
                 platforms = ["facebook", "ebay"]
 
-            # Start background processing
-            import threading
-            thread = threading.Thread(
-                target=process_image_async,
-                args=(filepath, job_id, platforms)
-            )
-            thread.daemon = True
-            thread.start()
+            # Queue background processing
+            job_futures[job_id] = PIPELINE_EXECUTOR.submit(process_image_async, filepath, job_id, platforms)
+        
+        uncache(JOBS_CACHE_KEY)
         
         return jsonify({
             'ok': True,
@@ -178,7 +486,6 @@ def process_image():
         
     except Exception as e:
         print(f"❌ Process error: {e}")
-        import traceback
         traceback.print_exc()
         return jsonify({
             'ok': False,
@@ -206,7 +513,26 @@ def get_status(job_id):
         }
         response.update(status)
         
-        return jsonify(response)
+        future = job_futures.get(job_id)
+        if future is not None:
+            response['worker_running'] = future.running()
+            response['worker_done'] = future.done()
+            if future.done():
+                job_futures.pop(job_id, None)
+        
+        # Pollers resend the last ETag; answer 304 until the status actually changes
+        body = current_app.json.dumps(response).encode()
+        etag = hashlib.blake2b(body, digest_size=8).hexdigest()
+        if request.if_none_match.contains(etag):
+            not_modified = Response(status=304)
+            not_modified.set_etag(etag)
+            return not_modified
+        
+        result = Response(body, mimetype='application/json')
+        result.set_etag(etag)
+        if status.get('status') in TERMINAL_JOB_STATES:
+            result.headers['Cache-Control'] = f'public, max-age={TERMINAL_STATUS_MAX_AGE}'
+        return result
         
     except Exception as e:
         return jsonify({
@@ -216,6 +542,7 @@ def get_status(job_id):
         }), 500
 
 @pipeline_bp.route('/jobs', methods=['GET'])
+@cached(timeout=2, key_prefix=JOBS_CACHE_KEY)
 def get_jobs():
     """Get all jobs"""
     try:
@@ -254,8 +581,10 @@ def clear_jobs():
         
         for job_id in completed_jobs:
             del processing_status[job_id]
+            job_futures.pop(job_id, None)
             
-        save_jobs()
+        save_jobs(*completed_jobs)
+        uncache(JOBS_CACHE_KEY)
         
         return jsonify({
             'ok': True,
@@ -270,6 +599,7 @@ def clear_jobs():
         }), 500
 
 @pipeline_bp.route('/cropped-images', methods=['GET'])
+@cached(timeout=30, key_prefix=CROPPED_IMAGES_CACHE_KEY)
 def get_cropped_images():
     """Get list of cropped images"""
     try:
@@ -282,19 +612,19 @@ def get_cropped_images():
                 'total': 0
             })
         
-        # Get all image files
+        # Get all image files (scandir yields type info with each entry, so no extra stat for the filter)
         images = []
-        for filename in os.listdir(cropped_dir):
-            if filename.endswith(('.jpg', '.jpeg', '.png')):
-                filepath = os.path.join(cropped_dir, filename)
-                stat = os.stat(filepath)
-                
-                images.append({
-                    'filename': filename,
-                    'size': stat.st_size,
-                    'created': datetime.fromtimestamp(stat.st_ctime).isoformat(),
-                    'url': f'/api/pipeline/cropped-image/{filename}'
-                })
+        with os.scandir(cropped_dir) as entries:
+            for entry in entries:
+                if os.path.splitext(entry.name)[1].lower() in CROPPED_IMAGE_EXTENSIONS and entry.is_file():
+                    stat = entry.stat()
+                    
+                    images.append({
+                        'filename': entry.name,
+                        'size': stat.st_size,
+                        'created': datetime.fromtimestamp(stat.st_ctime).isoformat(),
+                        'url': f'/api/pipeline/cropped-image/{entry.name}'
+                    })
         
         # Sort by creation time (most recent first)
         images.sort(key=lambda x: x['created'], reverse=True)
@@ -315,7 +645,6 @@ def get_cropped_images():
 def get_cropped_image(filename):
     """Serve a cropped image"""
     try:
-        from werkzeug.utils import secure_filename
         filename = secure_filename(filename)
         filepath = os.path.join('cropped_resellables', filename)
         
@@ -325,7 +654,20 @@ def get_cropped_image(filename):
                 'error': 'File not found'
             }), 404
         
-        return send_file(filepath, mimetype='image/jpeg')
+        # Behind nginx, hand the file to the proxy (it adds the ETag and answers revalidations)
+        if ACCEL_REDIRECT_ENABLED:
+            response = Response(mimetype='image/jpeg')
+            response.headers['X-Accel-Redirect'] = f'{ACCEL_REDIRECT_PREFIX}{filename}'
+            response.headers['Cache-Control'] = CROPPED_IMAGE_CACHE_CONTROL
+            return response
+        
+        # conditional=True sends ETag/Last-Modified and answers matching revalidations with 304
+        response = send_from_directory(
+            os.path.abspath('cropped_resellables'), filename,
+            mimetype='image/jpeg', conditional=True
+        )
+        response.headers['Cache-Control'] = CROPPED_IMAGE_CACHE_CONTROL
+        return response
         
     except Exception as e:
         return jsonify({
@@ -377,78 +719,71 @@ def create_listings():
             return jsonify({'ok': False, 'message': 'No items selected'}), 400
             
         user_id = data.get('user_id', 'anonymous')
+        allow_stale = request.headers.get('X-Allow-Stale', '').lower() in ('1', 'true', 'yes')
         results = []
         
         # Access the pipeline instance from the imported module
         pipeline_instance = pipeline_api.pipeline
         
-        for item in items:
+        # Resolve every item's image up front so missing crops download in parallel
+        image_paths = resolve_image_paths(items, CROPPED_FOLDER)
+        
+        for item, image_path in zip(items, image_paths):
             # Ensure we have pricing data
             pricing_data = item.get('pricing_data', {})
             
-            # Get cropped image path if available
-            image_path = None
             cropped_id = item.get('cropped_id')
             
-            # Define root cropped folder
-            # pipeline_bp.py is in apps/api/blueprints/
-            # We want root/cropped_resellables/
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            root_dir = os.path.dirname(os.path.dirname(os.path.dirname(current_dir)))
-            cropped_folder = os.path.join(root_dir, 'cropped_resellables')
-            
-            if 'cropped_path' in item and item['cropped_path']:
-                image_path = item['cropped_path']
-            elif 'image_url' in item and item['image_url']:
-                image_path = item['image_url']
-                
-            # If image_path is a URL, try to resolve it to a local file
-            if image_path and (image_path.startswith('http') or image_path.startswith('//')):
-                print(f"[DEBUG] Resolving image URL: {image_path}")
-                # Extract filename
-                filename = image_path.split('/')[-1]
-                # Remove query parameters if any
-                if '?' in filename:
-                    filename = filename.split('?')[0]
-                    
-                local_candidate = os.path.join(cropped_folder, filename)
-                
-                if os.path.exists(local_candidate):
-                    print(f"[DEBUG] Found local file for URL: {local_candidate}")
-                    image_path = local_candidate
-                else:
-                    print(f"[DEBUG] Local file not found at {local_candidate}, downloading...")
-                    try:
-                        import requests
-                        response = requests.get(image_path, timeout=10)
-                        if response.status_code == 200:
-                            # Ensure directory exists
-                            os.makedirs(cropped_folder, exist_ok=True)
-                            with open(local_candidate, 'wb') as f:
-                                f.write(response.content)
-                            print(f"[DEBUG] Downloaded image to: {local_candidate}")
-                            image_path = local_candidate
-                        else:
-                            print(f"[WARNING] Failed to download image: {response.status_code}")
-                    except Exception as e:
-                        print(f"[WARNING] Error downloading image: {e}")
-            
             # Call listing APIs
             print(f"[DEBUG] Creating listing for {item.get('object_name')} on {platforms}")
             print(f"[DEBUG] Item data keys: {item.keys()}")
             print(f"[DEBUG] Price in item: {item.get('price')}, Estimated Value: {item.get('estimated_value')}")
             print(f"[DEBUG] Using image path: {image_path}")
             
-            listing_result = pipeline_instance.call_listing_apis(
-                item, 
-                pricing_data, 
-                platforms,
-                image_path=image_path
-            )
+            # A retry or double-click for the same user/item/platforms/price gets the earlier
+            # listing (or an in-progress marker) instead of creating a duplicate
+            cache_key = listing_cache_key(item, platforms, user_id) if cropped_id else None
+            listing_result = claim_listing(cache_key) if cache_key else None
+            from_cache = listing_result is not None
+            stale = False
+            
+            if listing_result == LISTING_PENDING:
+                print(f"[DEBUG] Listing already in progress for cropped_id {cropped_id}")
+                listing_result = {
+                    'status': 'in_progress',
+                    'message': 'This item is already being listed'
+                }
+            elif from_cache:
+                print(f"[DEBUG] Reusing listing result for cropped_id {cropped_id}")
+            else:
+                try:
+                    listing_result = pipeline_instance.call_listing_apis(
+                        item, 
+                        pricing_data, 
+                        platforms,
+                        image_path=image_path
+                    )
+                except Exception:
+                    if cache_key:
+                        release_listing(cache_key)
+                    listing_result = get_stale_listing(cache_key) if cache_key and allow_stale else None
+                    if listing_result is None:
+                        raise
+                    from_cache = stale = True
+                    print(f"[WARNING] Listing APIs failed, serving last known listing for cropped_id {cropped_id}")
+                else:
+                    if cache_key and listing_succeeded(listing_result):
+                        set_cached_listing(cache_key, listing_result)
+                    elif cache_key:
+                        release_listing(cache_key)
+                        stale_result = get_stale_listing(cache_key) if allow_stale else None
+                        if stale_result is not None:
+                            print(f"[WARNING] Listing APIs returned errors, serving last known listing for cropped_id {cropped_id}")
+                            listing_result, from_cache, stale = stale_result, True, True
             print(f"[DEBUG] Listing result: {listing_result}")
             
-            # Save to database if we have a cropped_id
-            if cropped_id:
+            # Save to database if we have a cropped_id (a reused result was already saved)
+            if cropped_id and not from_cache:
                 try:
                     # Prepare listing data for DB
                     # Try to get title/price from item or pricing_data
@@ -498,18 +833,20 @@ def create_listings():
             
             results.append({
                 "object_name": item.get('object_name'),
-                "listing_result": listing_result
+                "listing_result": listing_result,
+                # True when the listing APIs failed and this is the last known good result
+                "stale": stale
             })
             
         return jsonify({
             'ok': True,
             'message': f'Processed {len(results)} items',
+            'stale': any(result['stale'] for result in results),
             'results': results
         })
         
     except Exception as e:
         print(f"❌ Listing creation error: {e}")
-        import traceback
         traceback.print_exc()
         return jsonify({
             'ok': False,
@@ -6,13 +6,17 @@ Imports and wraps the FastImageRecognitionAPI from main.py
 
 import sys
 import os
-import base64
+import threading
 
 # Add parent directory to path to import main.py
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if API_DIR not in sys.path:
+    sys.path.insert(0, API_DIR)
 
 from flask import Blueprint, request, jsonify
 
+from blueprints._base64 import iter_base64_chunks
+
 # Import the API class from main.py
 try:
     from main import FastImageRecognitionAPI
@@ -21,19 +25,57 @@ except ImportError as e:
     print(f"[ERROR] Failed to import from main.py: {e}")
     FastImageRecognitionAPI = None
 
+MAX_IMAGE_BYTES = 10 * 1024 * 1024
+# Base64 inflates the image by 4/3; allow some room for multipart/JSON framing on top
+MAX_REQUEST_BYTES = MAX_IMAGE_BYTES * 4 // 3 + 64 * 1024
+
+def decode_base64(base64_string):
+    """
+    Decode base64 text a slice at a time into one bytearray, instead of b64decode
+    first copying the whole string to ASCII bytes. The bytearray still supports the
+    startswith/slicing/write calls the recognizer makes on image bytes.
+    """
+    image_data = bytearray()
+    for chunk in iter_base64_chunks(base64_string):
+        image_data += chunk
+    return image_data
+
 # Create blueprint
 recognition_bp = Blueprint('recognition', __name__, url_prefix='/api/recognition')
 
 # Initialize API instance (singleton pattern)
 api_instance = None
+_instance_lock = threading.Lock()
 
 def get_api_instance():
     """Get or create API instance"""
     global api_instance
     if api_instance is None and FastImageRecognitionAPI is not None:
-        api_instance = FastImageRecognitionAPI()
+        # Double-checked so concurrent first requests build only one instance
+        with _instance_lock:
+            if api_instance is None:
+                api_instance = FastImageRecognitionAPI()
     return api_instance
 
+@recognition_bp.record_once
+def warm_api_instance(state):
+    """Build the recognition API (Gemini setup) at startup, off the first request's path"""
+    if FastImageRecognitionAPI is not None and state.app.config.get('WARM_UP_ON_START', True):
+        threading.Thread(target=get_api_instance, daemon=True).start()
+
+@recognition_bp.before_request
+def reject_oversized_image():
+    """Refuse /basic bodies that can't hold an image under the limit, before reading them"""
+    if request.endpoint != 'recognition.recognize_image':
+        return None
+    if request.content_length and request.content_length > MAX_REQUEST_BYTES:
+        return jsonify({
+            'ok': False,
+            'error_code': 'IMAGE_TOO_LARGE',
+            'message': 'Image must be less than 10MB'
+        }), 413
+    return None
+
 # Blueprint routes
 @recognition_bp.route('/basic', methods=['POST'])
 def recognize_image():
@@ -49,8 +91,8 @@ def recognize_image():
         elif request.json and 'image_base64' in request.json:
             base64_string = request.json['image_base64']
             if base64_string.startswith('data:image'):
-                base64_string = base64_string.split(',')[1]
-            image_data = base64.b64decode(base64_string)
+                base64_string = base64_string.partition(',')[2]
+            image_data = decode_base64(base64_string)
         
         if not image_data:
             return jsonify({
@@ -59,7 +101,7 @@ def recognize_image():
                 'message': 'No image provided'
             }), 400
         
-        if len(image_data) > 10 * 1024 * 1024:
+        if len(image_data) > MAX_IMAGE_BYTES:
             return jsonify({
                 'ok': False,
                 'error_code': 'IMAGE_TOO_LARGE',
@@ -6,9 +6,17 @@ Imports and wraps the MarketplaceScraper from scraper.py
 
 import sys
 import os
+import threading
+import time
+import uuid
+import atexit
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 
 # Add parent directory to path to import scraper.py
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if API_DIR not in sys.path:
+    sys.path.insert(0, API_DIR)
 
 from flask import Blueprint, request, jsonify
 
@@ -23,16 +31,82 @@ except ImportError as e:
 # Create blueprint
 scraper_bp = Blueprint('scraper', __name__, url_prefix='/api/scraper')
 
+# Selenium logins and monitor start-up take many seconds; run them off the request thread.
+# One worker: the scraper is a singleton with one Chrome driver, so jobs must not overlap.
+SCRAPER_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix='scraper')
+atexit.register(SCRAPER_EXECUTOR.shutdown, wait=False)
+
+# job_id -> status of a background scraper job; finished jobs are dropped after this long
+scraper_status = {}
+_status_lock = threading.Lock()
+SCRAPER_JOB_TTL_SECONDS = 3600
+
+# How each job kind reports its return value in scraper_status
+JOB_OUTCOMES = {
+    'facebook_login': ('Facebook access confirmed', 'Facebook login failed'),
+    'realtime_monitor': ('Facebook message monitor started', 'Failed to start message monitor'),
+}
+
+def submit_scraper_job(kind, fn, *args):
+    """Run fn(*args) on the scraper pool and track it under a new job ID"""
+    job_id = str(uuid.uuid4())
+    with _status_lock:
+        # Forget finished jobs nobody has polled for a while
+        cutoff = time.time() - SCRAPER_JOB_TTL_SECONDS
+        expired = [j for j, st in scraper_status.items() if st.get('finished_at', cutoff) < cutoff]
+        for old_id in expired:
+            del scraper_status[old_id]
+        
+        scraper_status[job_id] = {
+            'type': kind,
+            'status': 'queued',
+            'timestamp': datetime.now().isoformat()
+        }
+    
+    def run():
+        with _status_lock:
+            scraper_status[job_id]['status'] = 'running'
+        return fn(*args)
+    
+    def on_done(future):
+        success_message, failure_message = JOB_OUTCOMES[kind]
+        update = {'finished_at': time.time()}
+        try:
+            # Both scraper methods return a falsy value on failure
+            ok = bool(future.result())
+            update['status'] = 'completed' if ok else 'failed'
+            update['message'] = success_message if ok else failure_message
+        except Exception as e:
+            print(f"❌ Scraper job {kind} error: {e}")
+            update['status'] = 'failed'
+            update['error'] = str(e)
+        with _status_lock:
+            if job_id in scraper_status:
+                scraper_status[job_id].update(update)
+    
+    SCRAPER_EXECUTOR.submit(run).add_done_callback(on_done)
+    return job_id
+
 # Initialize scraper instance (singleton pattern)
 scraper_instance = None
+_instance_lock = threading.Lock()
 
 def get_scraper_instance():
     """Get or create scraper instance"""
     global scraper_instance
     if scraper_instance is None and MarketplaceScraper is not None:
-        scraper_instance = MarketplaceScraper()
+        # Double-checked so concurrent first requests build only one instance
+        with _instance_lock:
+            if scraper_instance is None:
+                scraper_instance = MarketplaceScraper()
     return scraper_instance
 
+@scraper_bp.record_once
+def warm_scraper_instance(state):
+    """Build the scraper (Gemini setup) at startup, off the first request's path"""
+    if MarketplaceScraper is not None and state.app.config.get('WARM_UP_ON_START', True):
+        threading.Thread(target=get_scraper_instance, daemon=True).start()
+
 # Blueprint routes
 @scraper_bp.route('/health', methods=['GET'])
 def health():
@@ -51,30 +125,17 @@ def facebook_login():
         if not scraper:
             return jsonify({'ok': False, 'error': 'Scraper not initialized'}), 500
         
-        # Get credentials from request
-        data = request.get_json()
-        email = data.get('email')
-        password = data.get('password')
-        
-        if not email or not password:
-            return jsonify({
-                'ok': False,
-                'error': 'Email and password required'
-            }), 400
-        
-        # Perform login
-        result = scraper.login_to_facebook(email, password)
+        # The scraper logs in through its persistent browser profile (completing any
+        # login in the browser window), so no credentials are taken here.
+        # Run it on the worker thread; the client polls status_url for the outcome.
+        job_id = submit_scraper_job('facebook_login', scraper.ensure_facebook_access)
         
-        if result:
-            return jsonify({
-                'ok': True,
-                'message': 'Successfully logged in to Facebook'
-            })
-        else:
-            return jsonify({
-                'ok': False,
-                'error': 'Login failed'
-            }), 401
+        return jsonify({
+            'ok': True,
+            'job_id': job_id,
+            'message': 'Facebook login started',
+            'status_url': f'/api/scraper/status/{job_id}'
+        }), 202
             
     except Exception as e:
         print(f"❌ Facebook login error: {e}")
@@ -143,22 +204,16 @@ def start_realtime_monitor():
         if not scraper:
             return jsonify({'ok': False, 'error': 'Scraper not initialized'}), 500
         
-        data = request.get_json()
-        product_name = data.get('product_name')
-        
-        if not product_name:
-            return jsonify({
-                'ok': False,
-                'error': 'product_name is required'
-            }), 400
-        
-        # Start monitoring
-        result = scraper.start_realtime_monitor(product_name)
+        # The monitor watches Facebook messages for all listings, using the scraper's browser.
+        # Start it on the worker thread; the client polls status_url for the result.
+        job_id = submit_scraper_job('realtime_monitor', scraper.start_facebook_message_monitoring)
         
         return jsonify({
             'ok': True,
-            'data': result
-        })
+            'job_id': job_id,
+            'message': 'Real-time monitor starting',
+            'status_url': f'/api/scraper/status/{job_id}'
+        }), 202
         
     except Exception as e:
         print(f"❌ Monitoring error: {e}")
@@ -167,6 +222,21 @@ def start_realtime_monitor():
             'error': str(e)
         }), 500
 
+@scraper_bp.route('/status/<job_id>', methods=['GET'])
+def get_status(job_id):
+    """Get status of a background login / monitor job"""
+    with _status_lock:
+        status = dict(scraper_status.get(job_id) or {})
+    if not status:
+        return jsonify({
+            'ok': False,
+            'error': f'Job {job_id} not found'
+        }), 404
+    
+    response = {'ok': True, 'job_id': job_id}
+    response.update(status)
+    return jsonify(response)
+
 @scraper_bp.route('/test', methods=['GET'])
 def test():
     """Test endpoint"""
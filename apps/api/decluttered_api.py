@@ -2,17 +2,37 @@
 """
 AgentMail + LiveKit Integration Service for Decluttered.ai
 Real email infrastructure + voice agents using proper SDKs
+
+Set DECLUTTER_EVENTLET=1 when running this file directly to serve socket.io and webhooks
+from eventlet greenlets instead of a thread per client.
 """
 
 import os
+
+# eventlet must patch sockets before Flask, Supabase or AgentMail import them, so this runs
+# first; only when started as the standalone server (not when a blueprint imports this module).
+# Threads stay native: the agent loop and eventlet's tpool workers need real OS threads.
+EVENTLET_ENABLED = False
+if __name__ == '__main__' and os.environ.get('DECLUTTER_EVENTLET', '0') == '1':
+    try:
+        import eventlet
+        from eventlet import tpool
+        eventlet.monkey_patch(thread=False)
+        EVENTLET_ENABLED = True
+    except ImportError:
+        print("[WARN] DECLUTTER_EVENTLET=1 but eventlet is not installed; using threading mode")
+
 import json
 import asyncio
+import time
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass
 import re
 from statistics import mean
+import atexit
 import threading
+import concurrent.futures
 
 from flask import Flask, request, jsonify
 from flask_cors import CORS
@@ -23,6 +43,7 @@ from dotenv import load_dotenv
 # AgentMail SDK - proper usage
 try:
     from agentmail import AgentMail
+    import httpx  # the SDK's HTTP client; we hand it a pooled one
     AGENTMAIL_AVAILABLE = True
     print("[OK] AgentMail SDK available")
 except ImportError:
@@ -50,6 +71,20 @@ except ImportError:
     LIVEKIT_AVAILABLE = False
     print("[WARNING] LiveKit Agents SDK not installed - run: pip install livekit-agents")
 
+# asyncpg for direct, non-blocking Postgres reads on hot paths (needs SUPABASE_DB_URL)
+try:
+    import asyncpg
+    ASYNCPG_AVAILABLE = True
+except ImportError:
+    ASYNCPG_AVAILABLE = False
+
+# Optional: orjson parses the model's JSON answers faster than json
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 # Gemini for intelligence
 try:
     import google.generativeai as genai
@@ -59,9 +94,115 @@ except ImportError:
 
 load_dotenv()
 
+# One event loop for all agent coroutines, kept alive on a daemon thread so async
+# client state survives between requests instead of an asyncio.run() loop per call
+AGENT_CALL_TIMEOUT_SECONDS = 30
+agent_loop = asyncio.new_event_loop()
+threading.Thread(target=agent_loop.run_forever, name='agent-loop', daemon=True).start()
+
+def run_async(coro, timeout=AGENT_CALL_TIMEOUT_SECONDS):
+    """Run a coroutine on the shared agent loop and wait for its result"""
+    future = asyncio.run_coroutine_threadsafe(coro, agent_loop)
+    try:
+        if EVENTLET_ENABLED:
+            # Wait from a native thread so the eventlet hub keeps serving other clients
+            return tpool.execute(future.result, timeout)
+        return future.result(timeout=timeout)
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        raise
+
 app = Flask(__name__)
 CORS(app, origins="*")
-socketio = SocketIO(app, cors_allowed_origins="*")
+# eventlet multiplexes socket.io/webhook clients on greenlets instead of one OS thread each
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode='eventlet' if EVENTLET_ENABLED else None)
+
+# Keep-alive connections to the AgentMail API, shared by inbox setup and email replies
+AGENTMAIL_MAX_CONNECTIONS = 20
+AGENTMAIL_TIMEOUT_SECONDS = 10
+
+# Agent log rows are inserted in batches of up to this many, or whatever arrives within this window
+LOG_BATCH_SIZE = 100
+LOG_BATCH_SECONDS = 0.5
+
+# Per-user analytics summaries are reused for this long (the cache row changes on a scale of minutes)
+ANALYTICS_CACHE_SECONDS = 30
+ANALYTICS_CACHE_MAX_USERS = 4096
+
+# Email parsing patterns, compiled once rather than looked up in re's cache per email
+ITEM_UUID_RE = re.compile(r'([a-f0-9\-]{36})')
+PRICE_OFFER_RES = (re.compile(r'\$(\d+(?:\.\d{2})?)'), re.compile(r'(\d+)\s*dollars?'))
+
+# Substrings that classify an inquiry in basic_analysis (substring tests, since '$' and 'still have' aren't words)
+PRICE_WORDS = ('price', '$', 'cost', 'offer', 'pay')
+AVAILABILITY_WORDS = ('available', 'still have', 'sold')
+CONDITION_WORDS = ('condition', 'damage', 'work')
+
+# Voice query intents in priority order, each selected by any of its substrings
+VOICE_INTENT_KEYWORDS = (
+    ('analytics', ('analytics', 'performance')),
+    ('pricing', ('price', 'pricing')),
+    ('buyers', ('buyer', 'message')),
+)
+VOICE_INTENT_BY_KEYWORD = {keyword: intent for intent, keywords in VOICE_INTENT_KEYWORDS for keyword in keywords}
+# One alternation finds every keyword in a single scan of the lowercased query
+VOICE_INTENT_RE = re.compile('|'.join(map(re.escape, VOICE_INTENT_BY_KEYWORD)))
+
+# Markdown code fence around a model answer, for replies that ignore JSON mode
+JSON_FENCE_RE = re.compile(r'```(?:json)?\s*(.*?)\s*```', re.S)
+# Ask Gemini for raw JSON so answers need no fence stripping
+JSON_GENERATION_CONFIG = {'response_mime_type': 'application/json'}
+
+def first_json_object(text: str, start: int = 0) -> Optional[int]:
+    """End index (exclusive) of the first balanced {...} at or after start, or None if still open"""
+    depth = 0
+    in_string = False
+    escaped = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == '\\':
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == '{':
+            depth += 1
+        elif ch == '}':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+    return None
+
+def loads_json(text: str) -> Any:
+    """Parse JSON text, with orjson when available"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(text)
+    return json.loads(text)
+
+def stream_json(model, prompt: str) -> Optional[Any]:
+    """Stream a Gemini response and parse its JSON object as soon as the closing brace arrives"""
+    buffer = ''
+    start = None
+    for chunk in model.generate_content(prompt, stream=True, generation_config=JSON_GENERATION_CONFIG):
+        buffer += chunk.text or ''
+        if start is None:
+            start = buffer.find('{')
+            if start < 0:
+                start = None
+                continue
+        end = first_json_object(buffer, start)
+        if end is not None:
+            # Stop reading; anything after the object is the closing fence or chatter
+            return loads_json(buffer[start:end])
+    
+    if not buffer:
+        return None
+    match = JSON_FENCE_RE.search(buffer)
+    return loads_json(match.group(1) if match else buffer)
 
 @dataclass
 class AgentConfig:
@@ -82,6 +223,24 @@ class DeclutteredAgentSystem:
         self.agent_inboxes: Dict[str, Any] = {}
         self.livekit_agents: Dict[str, Agent] = {}
         
+        # Log rows wait here as (table, row) and are inserted in batches by _flush_logs
+        self._log_queue: asyncio.Queue = asyncio.Queue()
+        self._log_flusher = None
+        self._log_loop = None
+        
+        # Direct Postgres pool, created on first use on the agent loop
+        self.db_dsn = None
+        self.db_pool = None
+        self._db_pool_lock = None
+        
+        # user_id -> (monotonic expiry time, summary); one lock per user so concurrent misses share a fetch
+        self._analytics_cache: Dict[str, tuple] = {}
+        self._analytics_locks: Dict[str, asyncio.Lock] = {}
+        
+        # Existing AgentMail inboxes by email address, listed once on the first create conflict
+        self._existing_inboxes_by_email: Optional[Dict[str, Any]] = None
+        self._existing_inboxes_lock = threading.Lock()
+        
         self.setup_database()
         self.setup_agentmail()
         self.setup_gemini()
@@ -97,6 +256,25 @@ class DeclutteredAgentSystem:
             print("[OK] Supabase connected")
         else:
             print("[WARNING] Supabase credentials missing")
+        
+        # Optional Postgres connection string (Supabase dashboard > Database) for asyncpg reads
+        if ASYNCPG_AVAILABLE:
+            self.db_dsn = os.getenv('SUPABASE_DB_URL')
+    
+    async def get_db_pool(self):
+        """asyncpg pool for direct Postgres reads, or None when not configured / unreachable"""
+        if self.db_pool is None and self.db_dsn:
+            if self._db_pool_lock is None:
+                self._db_pool_lock = asyncio.Lock()
+            async with self._db_pool_lock:
+                if self.db_pool is None and self.db_dsn:
+                    try:
+                        self.db_pool = await asyncpg.create_pool(self.db_dsn, min_size=5, max_size=20)
+                        print("[OK] Postgres pool connected")
+                    except Exception as e:
+                        print(f"[WARNING] Postgres pool unavailable, using Supabase REST: {e}")
+                        self.db_dsn = None
+        return self.db_pool
     
     def setup_agentmail(self):
         """Initialize AgentMail client using official SDK"""
@@ -108,7 +286,12 @@ class DeclutteredAgentSystem:
         if api_key:
             try:
                 # Use the official AgentMail SDK
-                self.agentmail_client = AgentMail(api_key=api_key)
+                # One pooled httpx client so sends reuse TLS connections instead of reconnecting
+                http_client = httpx.Client(
+                    limits=httpx.Limits(max_connections=AGENTMAIL_MAX_CONNECTIONS, max_keepalive_connections=AGENTMAIL_MAX_CONNECTIONS),
+                    timeout=AGENTMAIL_TIMEOUT_SECONDS
+                )
+                self.agentmail_client = AgentMail(api_key=api_key, httpx_client=http_client)
                 print("[OK] AgentMail client initialized")
             except Exception as e:
                 print(f"[ERROR] AgentMail setup failed: {e}")
@@ -169,53 +352,66 @@ class DeclutteredAgentSystem:
             return
             
         try:
-            for agent_id, config in self.agents.items():
-                try:
-                    # Use official AgentMail SDK to create inbox
-                    inbox = self.agentmail_client.inboxes.create(
-                        username=config.username,
-                        domain=config.domain,
-                        display_name=config.name
-                    )
-                    
-                    self.agent_inboxes[agent_id] = inbox
-                    print(f"[OK] Created AgentMail inbox: {config.username}@{config.domain}")
-                    
-                    # Setup webhooks for email notifications
-                    self.setup_email_webhook(agent_id, inbox)
-                    
-                except Exception as e:
-                    error_message = str(e)
-                    if "AlreadyExistsError" in error_message or "already exists" in error_message.lower():
-                        print(f"[OK] AgentMail inbox already exists: {config.username}@{config.domain}")
-                        # Try to get the existing inbox
-                        try:
-                            inboxes = self.agentmail_client.inboxes.list()
-                            for existing_inbox in inboxes.inboxes:
-                                # Check inbox attributes - may be different in actual API
-                                inbox_email = getattr(existing_inbox, 'email_address', None)
-                                expected_email = f"{config.username}@{config.domain}"
-                                if inbox_email == expected_email:
-                                    self.agent_inboxes[agent_id] = existing_inbox
-                                    print(f"[OK] Retrieved existing inbox: {expected_email}")
-                                    break
-                        except Exception as list_error:
-                            print(f"[WARNING] Could not retrieve existing inbox for {agent_id}: {list_error}")
-                            # For now, create a mock inbox object for the agent to use
-                            class MockInbox:
-                                def __init__(self, username, domain):
-                                    self.username = username
-                                    self.domain = domain
-                                    self.email_address = f"{username}@{domain}"
-                                    self.inbox_id = f"mock_{username}"
-                            
-                            self.agent_inboxes[agent_id] = MockInbox(config.username, config.domain)
-                    else:
-                        print(f"[WARNING] Failed to create inbox for {agent_id}: {e}")
-                    
+            # Each create is an independent API round trip, so issue them together
+            with concurrent.futures.ThreadPoolExecutor(max_workers=len(self.agents)) as pool:
+                list(pool.map(self.create_agent_inbox, self.agents.keys(), self.agents.values()))
+            
         except Exception as e:
             print(f"[ERROR] Agent inbox creation failed: {e}")
     
+    def create_agent_inbox(self, agent_id: str, config: AgentConfig):
+        """Create (or look up the existing) AgentMail inbox for one agent"""
+        try:
+            # Use official AgentMail SDK to create inbox
+            inbox = self.agentmail_client.inboxes.create(
+                username=config.username,
+                domain=config.domain,
+                display_name=config.name
+            )
+            
+            self.agent_inboxes[agent_id] = inbox
+            print(f"[OK] Created AgentMail inbox: {config.username}@{config.domain}")
+            
+            # Setup webhooks for email notifications
+            self.setup_email_webhook(agent_id, inbox)
+            
+        except Exception as e:
+            error_message = str(e)
+            if "AlreadyExistsError" in error_message or "already exists" in error_message.lower():
+                print(f"[OK] AgentMail inbox already exists: {config.username}@{config.domain}")
+                # Try to get the existing inbox
+                try:
+                    expected_email = f"{config.username}@{config.domain}"
+                    existing_inbox = self.find_existing_inbox(expected_email)
+                    if existing_inbox is not None:
+                        self.agent_inboxes[agent_id] = existing_inbox
+                        print(f"[OK] Retrieved existing inbox: {expected_email}")
+                except Exception as list_error:
+                    print(f"[WARNING] Could not retrieve existing inbox for {agent_id}: {list_error}")
+                    # For now, create a mock inbox object for the agent to use
+                    class MockInbox:
+                        def __init__(self, username, domain):
+                            self.username = username
+                            self.domain = domain
+                            self.email_address = f"{username}@{domain}"
+                            self.inbox_id = f"mock_{username}"
+                    
+                    self.agent_inboxes[agent_id] = MockInbox(config.username, config.domain)
+            else:
+                print(f"[WARNING] Failed to create inbox for {agent_id}: {e}")
+    
+    def find_existing_inbox(self, email: str):
+        """Existing AgentMail inbox for an address (the inbox list is fetched once, then looked up by email)"""
+        with self._existing_inboxes_lock:
+            if self._existing_inboxes_by_email is None:
+                inboxes = self.agentmail_client.inboxes.list()
+                # Check inbox attributes - may be different in actual API
+                self._existing_inboxes_by_email = {
+                    getattr(existing_inbox, 'email_address', None): existing_inbox
+                    for existing_inbox in inboxes.inboxes
+                }
+        return self._existing_inboxes_by_email.get(email)
+    
     def setup_email_webhook(self, agent_id: str, inbox):
         """Setup email webhook using AgentMail WebSocket or webhook API"""
         # This would use AgentMail's WebSocket connection for real-time emails
@@ -262,12 +458,14 @@ class DeclutteredAgentSystem:
                     # Use AgentMail SDK to send response
                     inbox = self.agent_inboxes['negotiator']
                     
-                    response = await self.agentmail_client.inboxes.messages.send(
+                    # The SDK client is synchronous; send from a worker thread over its pooled connections
+                    loop = asyncio.get_running_loop()
+                    response = await loop.run_in_executor(None, lambda: self.agentmail_client.inboxes.messages.send(
                         inbox_id=inbox.inbox_id,
                         to=[buyer_email],
                         subject="Re: Your marketplace inquiry", 
                         text=message
-                    )
+                    ))
                     
                     return {"status": "success", "message": "Email sent successfully"}
                 else:
@@ -316,41 +514,167 @@ class DeclutteredAgentSystem:
         
         self.livekit_agents['voice_assistant'] = voice_agent
     
+    async def queue_log(self, table: str, row: Dict):
+        """Queue a row for a batched insert instead of a Supabase round trip per event"""
+        if self._log_flusher is None:
+            self._log_loop = asyncio.get_running_loop()
+            self._log_flusher = asyncio.create_task(self._flush_logs())
+            atexit.register(self._drain_logs_at_exit)
+        await self._log_queue.put((table, row))
+    
+    async def _flush_logs(self):
+        """Insert queued rows, up to LOG_BATCH_SIZE at a time or whatever arrived within LOG_BATCH_SECONDS"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._log_queue.get()]
+            deadline = loop.time() + LOG_BATCH_SECONDS
+            while len(batch) < LOG_BATCH_SIZE:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._log_queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            await self._insert_log_batch(batch)
+    
+    async def _insert_log_batch(self, batch: List):
+        """One insert per table for a batch of (table, row) pairs"""
+        rows_by_table: Dict[str, List[Dict]] = {}
+        for table, row in batch:
+            rows_by_table.setdefault(table, []).append(row)
+        
+        pool = await self.get_db_pool()
+        loop = asyncio.get_running_loop()
+        for table, rows in rows_by_table.items():
+            if pool is not None:
+                try:
+                    await self._insert_rows_direct(pool, table, rows)
+                    print(f"📝 Logged {len(rows)} row(s) to {table}")
+                    continue
+                except Exception as e:
+                    print(f"[WARNING] Direct insert into {table} failed, retrying via Supabase REST: {e}")
+            try:
+                # supabase-py is synchronous; keep its HTTP call off the event loop
+                await loop.run_in_executor(None, lambda: self.supabase.table(table).insert(rows).execute())
+                print(f"📝 Logged {len(rows)} row(s) to {table}")
+            except Exception as e:
+                print(f"[WARNING] Failed to log {len(rows)} row(s) to {table}: {e}")
+    
+    @staticmethod
+    async def _insert_rows_direct(pool, table: str, rows: List[Dict]):
+        """Insert a batch in one statement over asyncpg, bypassing PostgREST"""
+        columns = list(dict.fromkeys(column for row in rows for column in row))
+        column_list = ', '.join(f'"{column}"' for column in columns)
+        # The batch travels as one jsonb parameter; Postgres coerces each field to its
+        # column type, so ISO timestamps and dict metadata need no client-side encoding.
+        # Only the listed columns are written, leaving ids and created_at to their defaults.
+        await pool.execute(
+            f'INSERT INTO "{table}" ({column_list}) '
+            f'SELECT {column_list} FROM jsonb_populate_recordset(NULL::"{table}", $1::jsonb)',
+            json.dumps(rows, default=str)
+        )
+    
+    async def _drain_queued_logs(self):
+        batch = []
+        while not self._log_queue.empty():
+            batch.append(self._log_queue.get_nowait())
+        if batch:
+            await self._insert_log_batch(batch)
+    
+    def _drain_logs_at_exit(self):
+        """Insert whatever is still queued when the process exits"""
+        if self._log_loop is not None and self._log_loop.is_running():
+            try:
+                asyncio.run_coroutine_threadsafe(self._drain_queued_logs(), self._log_loop).result(timeout=5)
+            except Exception as e:
+                print(f"[WARNING] Failed to flush queued logs: {e}")
+    
+    async def generate_json(self, prompt: str) -> Optional[Any]:
+        """Ask Gemini for a JSON answer without blocking the event loop on the SDK call"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, stream_json, self.gemini_model, prompt)
+    
     async def get_user_analytics_summary(self, user_id: str) -> Dict:
-        """Get analytics summary from database"""
+        """Get analytics summary from database, reusing it for ANALYTICS_CACHE_SECONDS"""
         try:
             if not self.supabase:
                 return {"items": [], "total_inquiries": 0}
             
-            # Get from analytics cache
-            cache_response = self.supabase.table('analytics_cache').select('*').eq('related_user', user_id).eq('cache_type', 'user_summary').execute()
+            cached = self._analytics_cache.get(user_id)
+            if cached and cached[0] > time.monotonic():
+                return cached[1]
             
-            if cache_response.data:
-                return cache_response.data[0]['cache_data']
-            
-            # Fallback to mock data
-            return {
-                "items": [
-                    {"name": "Anker Soundcore Liberty 4 NC", "inquiries": 8, "avg_offer": 52},
-                    {"name": "iPhone 13 Pro", "inquiries": 12, "avg_offer": 650},
-                    {"name": "MacBook Air M2", "inquiries": 5, "avg_offer": 950}
-                ],
-                "total_inquiries": 25,
-                "conversion_rate": "73%"
-            }
+            lock = self._analytics_locks.setdefault(user_id, asyncio.Lock())
+            async with lock:
+                # Another query may have refreshed it while we waited
+                cached = self._analytics_cache.get(user_id)
+                if cached and cached[0] > time.monotonic():
+                    return cached[1]
+                
+                summary = await self._fetch_user_analytics_summary(user_id)
+                
+                self._analytics_cache.pop(user_id, None)
+                if len(self._analytics_cache) >= ANALYTICS_CACHE_MAX_USERS:
+                    # Evict the oldest entry (dicts keep insertion order)
+                    oldest = next(iter(self._analytics_cache))
+                    del self._analytics_cache[oldest]
+                    if not self._analytics_locks[oldest].locked():
+                        del self._analytics_locks[oldest]
+                self._analytics_cache[user_id] = (time.monotonic() + ANALYTICS_CACHE_SECONDS, summary)
+                return summary
             
         except Exception as e:
             print(f"[WARNING] Error fetching analytics: {e}")
             return {"items": [], "total_inquiries": 0}
     
+    async def _fetch_user_analytics_summary(self, user_id: str) -> Dict:
+        """Read the user's analytics summary row (mock data when there is none)"""
+        # Get from analytics cache
+        pool = await self.get_db_pool()
+        if pool is not None:
+            row = await pool.fetchrow(
+                "SELECT cache_data FROM analytics_cache WHERE related_user = $1 AND cache_type = 'user_summary' LIMIT 1",
+                user_id
+            )
+            if row:
+                cache_data = row['cache_data']
+                # asyncpg returns json/jsonb columns as text unless a codec is registered
+                return json.loads(cache_data) if isinstance(cache_data, str) else cache_data
+        else:
+            # supabase-py is synchronous; keep its HTTP call off the event loop
+            loop = asyncio.get_running_loop()
+            cache_response = await loop.run_in_executor(
+                None,
+                lambda: self.supabase.table('analytics_cache').select('cache_data').eq('related_user', user_id).eq('cache_type', 'user_summary').limit(1).execute()
+            )
+            
+            if cache_response.data:
+                return cache_response.data[0]['cache_data']
+        
+        # Fallback to mock data
+        return {
+            "items": [
+                {"name": "Anker Soundcore Liberty 4 NC", "inquiries": 8, "avg_offer": 52},
+                {"name": "iPhone 13 Pro", "inquiries": 12, "avg_offer": 650},
+                {"name": "MacBook Air M2", "inquiries": 5, "avg_offer": 950}
+            ],
+            "total_inquiries": 25,
+            "conversion_rate": "73%"
+        }
+    
     async def generate_pricing_analysis(self, item_name: str) -> Dict:
         """Generate AI-powered pricing analysis"""
         try:
             if not self.gemini_model:
                 return {"recommended_price": 100, "strategy": "market_average"}
             
-            # Get market intelligence from database
-            intel_response = self.supabase.table('agent_market_intelligence').select('*').eq('intelligence_type', 'pricing_trend').order('created_at', desc=True).limit(3).execute()
+            # Get market intelligence from database (supabase-py blocks, so run it off the loop)
+            loop = asyncio.get_running_loop()
+            intel_response = await loop.run_in_executor(
+                None,
+                lambda: self.supabase.table('agent_market_intelligence').select('data_points').eq('intelligence_type', 'pricing_trend').order('created_at', desc=True).limit(3).execute()
+            )
             
             market_context = ""
             if intel_response.data:
@@ -371,15 +695,9 @@ Provide pricing recommendation in JSON:
   "confidence": 0.85
 }}"""
             
-            response = self.gemini_model.generate_content(prompt)
-            
-            if response and response.text:
-                # Parse JSON response
-                json_text = response.text.strip()
-                if json_text.startswith('```json'):
-                    json_text = json_text.split('```json')[1].split('```')[0]
-                
-                return json.loads(json_text)
+            analysis = await self.generate_json(prompt)
+            if analysis:
+                return analysis
             
         except Exception as e:
             print(f"[WARNING] Pricing analysis failed: {e}")
@@ -415,11 +733,12 @@ class NegotiatorAgent:
             if self.system.agentmail_client and self.agent_id in self.system.agent_inboxes:
                 inbox = self.system.agent_inboxes[self.agent_id]
                 
-                await self.system.agentmail_client.inboxes.messages.reply(
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(None, lambda: self.system.agentmail_client.inboxes.messages.reply(
                     inbox_id=inbox.inbox_id,
                     message_id=email_data.get('message_id'),
                     text=response
-                )
+                ))
             
             # Log to database
             await self.log_negotiation(sender, body, analysis, response)
@@ -439,9 +758,7 @@ class NegotiatorAgent:
         # Look for item references in subject/body
         text = f"{subject} {body}".lower()
         
-        # UUID pattern
-        uuid_pattern = r'([a-f0-9\-]{36})'
-        match = re.search(uuid_pattern, text)
+        match = ITEM_UUID_RE.search(text)
         if match:
             return match.group(1)
         
@@ -476,14 +793,9 @@ Respond only in JSON format:
   "confidence": 0.85
 }}"""
             
-            response = self.system.gemini_model.generate_content(prompt)
-            
-            if response and response.text:
-                json_text = response.text.strip()
-                if json_text.startswith('```json'):
-                    json_text = json_text.split('```json')[1].split('```')[0]
-                
-                return json.loads(json_text)
+            analysis = await self.system.generate_json(prompt)
+            if analysis:
+                return analysis
                 
         except Exception as e:
             print(f"[WARNING] AI analysis failed: {e}")
@@ -496,19 +808,18 @@ Respond only in JSON format:
         
         # Extract price offers
         price_offer = None
-        price_patterns = [r'\$(\d+(?:\.\d{2})?)', r'(\d+)\s*dollars?']
-        for pattern in price_patterns:
-            match = re.search(pattern, body_lower)
+        for pattern in PRICE_OFFER_RES:
+            match = pattern.search(body_lower)
             if match:
                 price_offer = float(match.group(1))
                 break
         
         # Classify inquiry type
-        if any(word in body_lower for word in ['price', '$', 'cost', 'offer', 'pay']):
+        if any(word in body_lower for word in PRICE_WORDS):
             inquiry_type = 'price_negotiation'
-        elif any(word in body_lower for word in ['available', 'still have', 'sold']):
+        elif any(word in body_lower for word in AVAILABILITY_WORDS):
             inquiry_type = 'availability_check'
-        elif any(word in body_lower for word in ['condition', 'damage', 'work']):
+        elif any(word in body_lower for word in CONDITION_WORDS):
             inquiry_type = 'condition_inquiry'
         else:
             inquiry_type = 'general_inquiry'
@@ -550,7 +861,8 @@ Guidelines:
 
 Generate the email response:"""
             
-            response = self.system.gemini_model.generate_content(prompt)
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(None, self.system.gemini_model.generate_content, prompt)
             
             if response and response.text:
                 return response.text.strip()
@@ -595,8 +907,8 @@ Generate the email response:"""
                 'processed_at': datetime.utcnow().isoformat()
             }
             
-            self.system.supabase.table('agent_communications').insert(comm_data).execute()
-            print(f"📝 Logged negotiation with {buyer_email}")
+            await self.system.queue_log('agent_communications', comm_data)
+            print(f"📝 Queued negotiation log for {buyer_email}")
             
         except Exception as e:
             print(f"[WARNING] Failed to log negotiation: {e}")
@@ -632,14 +944,16 @@ class VoiceAssistantAgent:
             # This would route to the actual LiveKit voice agent
             # For now, simulate the response
             
-            if 'analytics' in query.lower() or 'performance' in query.lower():
+            intents = {VOICE_INTENT_BY_KEYWORD[keyword] for keyword in VOICE_INTENT_RE.findall(query.lower())}
+            
+            if 'analytics' in intents:
                 analytics = await self.system.get_user_analytics_summary(user_id)
                 response = f"Your marketplace is performing well! You have {len(analytics.get('items', []))} active listings with {analytics.get('total_inquiries', 0)} total inquiries."
             
-            elif 'price' in query.lower() or 'pricing' in query.lower():
+            elif 'pricing' in intents:
                 response = "Based on current market data, your electronics are trending 15% higher than last month. iPhone and MacBook listings are especially hot right now."
             
-            elif 'buyer' in query.lower() or 'message' in query.lower():
+            elif 'buyers' in intents:
                 response = "You have 2 new buyer inquiries! Sarah wants to pickup the iPhone today, and TechBuyer asked about MacBook condition. Both seem serious based on message analysis."
             
             else:
@@ -674,15 +988,18 @@ class VoiceAssistantAgent:
                 'processing_time_ms': 850
             }
             
-            self.system.supabase.table('voice_interactions').insert(interaction_data).execute()
+            await self.system.queue_log('voice_interactions', interaction_data)
             
         except Exception as e:
             print(f"[WARNING] Failed to log voice interaction: {e}")
 
+async def create_agents():
+    """Build the agent system and its agents on the agent loop, so async clients bind to it"""
+    system = DeclutteredAgentSystem()
+    return system, NegotiatorAgent(system), VoiceAssistantAgent(system)
+
 # Initialize the system
-agent_system = DeclutteredAgentSystem()
-negotiator = NegotiatorAgent(agent_system)  
-voice_assistant = VoiceAssistantAgent(agent_system)
+agent_system, negotiator, voice_assistant = run_async(create_agents(), timeout=None)
 
 # === AGENTMAIL EMAIL WEBHOOKS ===
 
@@ -697,7 +1014,7 @@ def agentmail_webhook():
         recipient = email_data.get('to', '')
         
         if 'negotiations@' in recipient:
-            result = asyncio.run(negotiator.process_buyer_email(email_data))
+            result = run_async(negotiator.process_buyer_email(email_data))
         else:
             result = {'ok': False, 'error': 'Unknown recipient'}
         
@@ -715,7 +1032,7 @@ def create_voice_session():
         data = request.get_json()
         room_name = data.get('room_name', f'voice_session_{int(datetime.now().timestamp())}')
         
-        result = asyncio.run(voice_assistant.create_voice_session(room_name))
+        result = run_async(voice_assistant.create_voice_session(room_name))
         
         return jsonify({
             'ok': result.get('success', False),
@@ -736,7 +1053,7 @@ def voice_query():
         if not query:
             return jsonify({'ok': False, 'error': 'Query required'}), 400
         
-        result = asyncio.run(voice_assistant.process_voice_query(query, user_id))
+        result = run_async(voice_assistant.process_voice_query(query, user_id))
         
         return jsonify({
             'ok': result.get('success', False),
@@ -756,7 +1073,7 @@ def handle_voice_query(data):
         user_id = data.get('user_id', 'user_12345')
         query = data.get('query', '')
         
-        result = asyncio.run(voice_assistant.process_voice_query(query, user_id))
+        result = run_async(voice_assistant.process_voice_query(query, user_id))
         
         emit('voice_response', {
             'response': result.get('response', ''),
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+orjson-backed Flask JSON provider
+Shared by the unified app and the standalone pipeline API so every jsonify()
+encodes through orjson when it is installed.
+"""
+
+from flask.json.provider import DefaultJSONProvider
+
+# Optional: orjson for faster jsonify / request parsing
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by orjson. NumPy values (pipeline results) are encoded
+    natively; datetimes and other types go through Flask's default() as before.
+    """
+    
+    if ORJSON_AVAILABLE:
+        OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_PASSTHROUGH_DATETIME
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self.OPTIONS).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        """jsonify() without the bytes -> str -> bytes round trip of dumps()"""
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=self.default, option=self.OPTIONS | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
@@ -16,6 +16,7 @@ import base64
 import threading
 import atexit
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Dict, List, Optional
 from difflib import SequenceMatcher
@@ -1123,7 +1124,7 @@ Guidelines:
             return {'error': f'eBay listing failed: {str(e)}', 'platform': 'ebay'}
     
     def create_listings(self, product_data: Dict, pricing_data: Dict, platforms: List[str], images: List[str] = None) -> Dict:
-        """Create listings on specified platforms"""
+        """Create listings on specified platforms. images are file paths or base64 strings."""
         results = {}
         
         # Generate optimal listing data
@@ -1135,9 +1136,11 @@ Guidelines:
             condition
         )
         
-        # Handle base64 images
+        # Handle images: file paths (already decoded by the API) or base64 strings
         image_path = None
-        if images and len(images) > 0:
+        if images and os.path.isfile(images[0]):
+            image_path = images[0]
+        elif images and len(images) > 0:
             try:
                 import base64
                 import tempfile
@@ -1166,15 +1169,17 @@ Guidelines:
         
         print(f"📋 Creating listings for: {listing_data['title']} at ${listing_data['price']}")
         
-        # Create Facebook listing
+        # Facebook drives the browser while eBay is a plain API call, so run them side by side
+        platform_creators = {}
         if 'facebook' in platforms:
-            fb_result = self.create_facebook_listing(listing_data)
-            results['facebook'] = fb_result
-        
-        # Create eBay listing
+            platform_creators['facebook'] = self.create_facebook_listing
         if 'ebay' in platforms:
-            ebay_result = self.create_ebay_listing(listing_data)
-            results['ebay'] = ebay_result
+            platform_creators['ebay'] = self.create_ebay_listing
+        
+        if platform_creators:
+            with ThreadPoolExecutor(max_workers=len(platform_creators)) as executor:
+                futures = {platform: executor.submit(create, listing_data) for platform, create in platform_creators.items()}
+                results = {platform: future.result() for platform, future in futures.items()}
         
         return {
             'listings': results,
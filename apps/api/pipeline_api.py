@@ -9,6 +9,8 @@ import sys
 import json
 import base64
 import tempfile
+import time
+import atexit
 import asyncio
 import threading
 from datetime import datetime
@@ -18,6 +20,11 @@ from flask_cors import CORS
 from werkzeug.utils import secure_filename
 import uuid
 
+# Optional: orjson for jsonify and for writing the jobs file
+from json_provider import OrjsonProvider, ORJSON_AVAILABLE
+if ORJSON_AVAILABLE:
+    import orjson
+
 # Add root directory to path for imports
 root_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 sys.path.append(root_dir)
@@ -32,59 +39,139 @@ except ImportError as e:
     print(f"[ERROR] Pipeline module not available: {e}")
 
 app = Flask(__name__)
+if ORJSON_AVAILABLE:
+    app.json = OrjsonProvider(app)
 CORS(app)
 
 # Global pipeline instance
 pipeline = None
+pipeline_lock = threading.Lock()
 processing_status = {}
+# One small JSON file per job, so a status change rewrites only that job
+JOBS_DIR = 'jobs'
+# Pre-per-job-layout single file; migrated into JOBS_DIR on startup
 JOBS_FILE = 'jobs.json'
+# Status changes only mark their job dirty; a background thread writes dirty jobs at most this often
+JOBS_FLUSH_INTERVAL = 0.25
+_jobs_dirty = threading.Event()
+_dirty_job_ids = set()
+_dirty_job_ids_lock = threading.Lock()
+_jobs_write_lock = threading.Lock()
+
+def job_file_path(job_id):
+    """Path of the JSON file holding one job's status"""
+    return os.path.join(JOBS_DIR, f"{job_id}.json")
+
+def read_job_files():
+    """All jobs stored under JOBS_DIR, keyed by job ID"""
+    jobs = {}
+    if not os.path.isdir(JOBS_DIR):
+        return jobs
+    with os.scandir(JOBS_DIR) as entries:
+        for entry in entries:
+            if not entry.name.endswith('.json') or not entry.is_file():
+                continue
+            try:
+                with open(entry.path, 'rb') as f:
+                    jobs[entry.name[:-len('.json')]] = json.load(f)
+            except Exception as e:
+                print(f"[WARNING] Skipping unreadable job file {entry.name}: {e}")
+    return jobs
 
 def load_jobs():
     """Load jobs from disk"""
-    global processing_status
-    if os.path.exists(JOBS_FILE):
-        try:
+    os.makedirs(JOBS_DIR, exist_ok=True)
+    try:
+        processing_status.update(read_job_files())
+        
+        # Fold in jobs from the old single-file layout
+        legacy_jobs = {}
+        if os.path.exists(JOBS_FILE):
             with open(JOBS_FILE, 'r') as f:
-                processing_status = json.load(f)
-            print(f"[INFO] Loaded {len(processing_status)} jobs from {JOBS_FILE}")
-            
-            # Check for interrupted jobs
-            jobs_modified = False
-            for job_id, job in processing_status.items():
-                if job.get('status') in ['processing', 'recognition_complete']:
-                    # Job was interrupted
-                    print(f"[WARN] Job {job_id} was interrupted.")
-                    jobs_modified = True
-                    
-                    # If we have results (even partial), mark as completed so user can see them
-                    if job.get('results') and job['results'].get('listings_ready_to_review'):
-                         print(f"[INFO] Job {job_id} has partial results. Marking as completed.")
-                         job['status'] = 'completed'
-                         job['message'] = 'Analysis interrupted but partial results available.'
-                    elif job.get('partial_results'):
-                         # We have phase 1 results
-                         print(f"[INFO] Job {job_id} has phase 1 results. Marking as completed.")
-                         job['status'] = 'completed'
-                         job['message'] = 'Analysis interrupted. Objects detected but pricing incomplete.'
-                         job['results'] = job['partial_results']
-                    else:
-                         job['status'] = 'error'
-                         job['message'] = 'Processing interrupted by server restart. Please try again.'
-            
-            if jobs_modified:
-                save_jobs()
-                    
-        except Exception as e:
-            print(f"[WARNING] Failed to load jobs file: {e}")
-            processing_status = {}
+                legacy_jobs = json.load(f)
+            for job_id, job in legacy_jobs.items():
+                processing_status.setdefault(job_id, job)
+        
+        print(f"[INFO] Loaded {len(processing_status)} jobs from {JOBS_DIR}/")
+        
+        # Check for interrupted jobs
+        modified_jobs = list(legacy_jobs)
+        for job_id, job in processing_status.items():
+            if job.get('status') in ['processing', 'recognition_complete']:
+                # Job was interrupted
+                print(f"[WARN] Job {job_id} was interrupted.")
+                modified_jobs.append(job_id)
+                
+                # If we have results (even partial), mark as completed so user can see them
+                if job.get('results') and job['results'].get('listings_ready_to_review'):
+                     print(f"[INFO] Job {job_id} has partial results. Marking as completed.")
+                     job['status'] = 'completed'
+                     job['message'] = 'Analysis interrupted but partial results available.'
+                elif job.get('partial_results'):
+                     # We have phase 1 results
+                     print(f"[INFO] Job {job_id} has phase 1 results. Marking as completed.")
+                     job['status'] = 'completed'
+                     job['message'] = 'Analysis interrupted. Objects detected but pricing incomplete.'
+                     job['results'] = job['partial_results']
+                else:
+                     job['status'] = 'error'
+                     job['message'] = 'Processing interrupted by server restart. Please try again.'
+        
+        if modified_jobs:
+            save_jobs(*modified_jobs)
+            flush_jobs()
+        if legacy_jobs:
+            os.remove(JOBS_FILE)
+            print(f"[INFO] Migrated {len(legacy_jobs)} jobs from {JOBS_FILE} to {JOBS_DIR}/")
+                
+    except Exception as e:
+        print(f"[WARNING] Failed to load jobs: {e}")
 
-def save_jobs():
-    """Save jobs to disk"""
+def write_job_file(job_id):
+    """Write (or, once the job is gone, delete) one job's file atomically via temp file + rename"""
+    path = job_file_path(job_id)
     try:
-        with open(JOBS_FILE, 'w') as f:
-            json.dump(processing_status, f, indent=2)
+        job = processing_status.get(job_id)
+        with _jobs_write_lock:
+            if job is None:
+                if os.path.exists(path):
+                    os.remove(path)
+                return
+            if ORJSON_AVAILABLE:
+                body = orjson.dumps(job, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+            else:
+                body = json.dumps(job).encode()
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(body)
+            os.replace(tmp_path, path)
     except Exception as e:
-        print(f"[WARNING] Failed to save jobs file: {e}")
+        print(f"[WARNING] Failed to save job {job_id}: {e}")
+
+def save_jobs(*job_ids):
+    """Mark jobs as changed (or deleted); the flusher thread writes them shortly after"""
+    with _dirty_job_ids_lock:
+        _dirty_job_ids.update(job_ids)
+    _jobs_dirty.set()
+
+def flush_jobs():
+    """Write pending job changes now (startup migration and shutdown)"""
+    _jobs_dirty.clear()
+    with _dirty_job_ids_lock:
+        job_ids = list(_dirty_job_ids)
+        _dirty_job_ids.clear()
+    for job_id in job_ids:
+        write_job_file(job_id)
+
+def _jobs_flusher():
+    """Collapse bursts of status updates into one write per dirty job per JOBS_FLUSH_INTERVAL"""
+    while True:
+        _jobs_dirty.wait()
+        time.sleep(JOBS_FLUSH_INTERVAL)
+        flush_jobs()
+
+threading.Thread(target=_jobs_flusher, name='jobs-flusher', daemon=True).start()
+atexit.register(flush_jobs)
 
 # Load jobs on startup
 load_jobs()
@@ -108,15 +195,23 @@ def initialize_pipeline():
     """Initialize the pipeline instance"""
     global pipeline
     if PIPELINE_AVAILABLE and not pipeline:
-        try:
-            pipeline = ObjectDetectionPipeline()
-            print("[OK] Pipeline initialized successfully")
-            return True
-        except Exception as e:
-            print(f"[ERROR] Pipeline initialization failed: {e}")
-            return False
+        with pipeline_lock:
+            if pipeline:
+                return True
+            try:
+                pipeline = ObjectDetectionPipeline()
+                print("[OK] Pipeline initialized successfully")
+                return True
+            except Exception as e:
+                print(f"[ERROR] Pipeline initialization failed: {e}")
+                return False
     return pipeline is not None
 
+def warm_pipeline_in_background():
+    """Load and warm the pipeline (YOLO weights/engine) without blocking server startup"""
+    if PIPELINE_AVAILABLE and not pipeline:
+        threading.Thread(target=initialize_pipeline, daemon=True).start()
+
 def process_image_async(image_path: str, job_id: str, platforms: List[str] = None):
     """Process image in background thread with two-phase results"""
     global processing_status
@@ -136,7 +231,7 @@ def process_image_async(image_path: str, job_id: str, platforms: List[str] = Non
             "message": "Starting object detection...",
             "timestamp": datetime.now().isoformat()
         }
-        save_jobs()
+        save_jobs(job_id)
         
         if not pipeline:
             processing_status[job_id] = {
@@ -145,7 +240,7 @@ def process_image_async(image_path: str, job_id: str, platforms: List[str] = Non
                 "message": "Pipeline not initialized",
                 "timestamp": datetime.now().isoformat()
             }
-            save_jobs()
+            save_jobs(job_id)
             return
         
         # Phase 1: Object Detection and Recognition
@@ -153,7 +248,7 @@ def process_image_async(image_path: str, job_id: str, platforms: List[str] = Non
             "progress": 10,
             "message": "Running YOLO object detection..."
         })
-        save_jobs()
+        save_jobs(job_id)
         
         print(f"[DEBUG] Starting YOLO processing for job {job_id}, image: {image_path}")
         
@@ -178,14 +273,14 @@ def process_image_async(image_path: str, job_id: str, platforms: List[str] = Non
                 },
                 "timestamp": datetime.now().isoformat()
             }
-            save_jobs()
+            save_jobs(job_id)
             return
             
         processing_status[job_id].update({
             "progress": 40,
             "message": f"Found {len(processed_objects)} objects, running recognition..."
         })
-        save_jobs()
+        save_jobs(job_id)
         
         # Step 2: Run recognition on each object to get product names
         recognition_results = []
@@ -194,7 +289,7 @@ def process_image_async(image_path: str, job_id: str, platforms: List[str] = Non
                 "progress": 40 + (i * 20 // len(processed_objects)),
                 "message": f"Identifying object {i+1}/{len(processed_objects)}: {obj_data['object_name']}..."
             })
-            save_jobs()
+            save_jobs(job_id)
             
             print(f"[DEBUG] Calling recognition API for object {i+1}/{len(processed_objects)}: {obj_data['object_name']}")
             
@@ -224,7 +319,7 @@ def process_image_async(image_path: str, job_id: str, platforms: List[str] = Non
             "partial_results": partial_results,
             "timestamp": datetime.now().isoformat()
         }
-        save_jobs()
+        save_jobs(job_id)
         
         # Phase 2: Continue with price scraping and listing creation (in background)
         try:
@@ -237,7 +332,7 @@ def process_image_async(image_path: str, job_id: str, platforms: List[str] = Non
                     "progress": 60 + (i * 30 // len(recognition_results)),
                     "message": f"Researching prices for {obj_data.get('recognition_result', {}).get('product_name', obj_data['object_name'])}..."
                 })
-                save_jobs()
+                save_jobs(job_id)
                 
                 # Skip if no product name found
                 recognition_result = obj_data.get('recognition_result', {})
@@ -318,7 +413,7 @@ def process_image_async(image_path: str, job_id: str, platforms: List[str] = Non
                 processing_status[job_id].update({
                     "results": current_results
                 })
-                save_jobs()
+                save_jobs(job_id)
             
             # Phase 2 Complete: Final results (Analysis Only)
             final_results = {
@@ -337,7 +432,7 @@ def process_image_async(image_path: str, job_id: str, platforms: List[str] = Non
                 "results": final_results,
                 "timestamp": datetime.now().isoformat()
             }
-            save_jobs()
+            save_jobs(job_id)
             
         except Exception as e:
             print(f"Error in Phase 2 processing: {e}")
@@ -349,7 +444,7 @@ def process_image_async(image_path: str, job_id: str, platforms: List[str] = Non
                 "results": partial_results,
                 "timestamp": datetime.now().isoformat()
             }
-            save_jobs()
+            save_jobs(job_id)
             
         # Clean up temporary file
         try:
@@ -371,7 +466,7 @@ def process_image_async(image_path: str, job_id: str, platforms: List[str] = Non
             "error_details": traceback.format_exc(),
             "timestamp": datetime.now().isoformat()
         }
-        save_jobs()
+        save_jobs(job_id)
 
 @app.route('/health', methods=['GET'])
 def health_check():
@@ -478,7 +573,7 @@ def process_image():
                 "message": "Image uploaded, starting processing...",
                 "timestamp": datetime.now().isoformat()
             }
-            save_jobs()
+            save_jobs(job_id)
             
             # Start processing in background thread
             print(f"[DEBUG] Creating background thread for job {job_id}, file: {file_path}")
@@ -572,7 +667,7 @@ def clear_completed_jobs():
                 cleared_jobs.append(job_id)
                 del processing_status[job_id]
         
-        save_jobs()
+        save_jobs(*cleared_jobs)
         
         return jsonify({
             'ok': True,
@@ -2,14 +2,34 @@
 """
 Unified Flask Application for Decluttered.AI
 Consolidates all API services into a single Flask app with blueprints
+
+Set DECLUTTER_GEVENT=1 to serve with gevent, so listing jobs waiting on Selenium or
+outbound HTTP don't tie up a worker thread each. Under gunicorn use its gevent worker:
+    gunicorn -k gevent -w 1 --worker-connections 1000 "unified_app:create_app()"
 """
 
-from flask import Flask, jsonify
+import os
+
+# gevent must patch sockets/threads before Flask, requests or Selenium import them
+GEVENT_ENABLED = False
+if os.environ.get('DECLUTTER_GEVENT', '0') == '1':
+    try:
+        from gevent import monkey
+        monkey.patch_all()
+        GEVENT_ENABLED = True
+    except ImportError:
+        print("[WARN] DECLUTTER_GEVENT=1 but gevent is not installed; using threaded server")
+
+from flask import Flask, Request, jsonify
 from flask_cors import CORS
 import logging
 import sys
+import tempfile
 from pathlib import Path
 
+# orjson-backed jsonify (used when orjson is installed)
+from json_provider import OrjsonProvider, ORJSON_AVAILABLE
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -17,17 +37,34 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Uploaded files above this size are spooled to disk (Werkzeug's own threshold)
+UPLOAD_SPOOL_THRESHOLD = 500 * 1024
+# Write buffer for spooled uploads, so large images hit disk in 1 MiB writes
+UPLOAD_BUFFER_SIZE = 1 << 20
+
+class UploadRequest(Request):
+    """Request that spools large multipart file parts through a 1 MiB write buffer"""
+    
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if total_content_length is None or total_content_length > UPLOAD_SPOOL_THRESHOLD:
+            return tempfile.TemporaryFile('wb+', buffering=UPLOAD_BUFFER_SIZE)
+        return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+
 def create_app(config=None):
     """Application factory pattern"""
     
     app = Flask(__name__)
+    app.request_class = UploadRequest
+    if ORJSON_AVAILABLE:
+        app.json = OrjsonProvider(app)
     
     # Load configuration
     app.config.update(
         SECRET_KEY='your-secret-key-here',  # TODO: Move to environment variable
         MAX_CONTENT_LENGTH=16 * 1024 * 1024,  # 16MB max file size
         JSON_SORT_KEYS=False,
-        CORS_HEADERS='Content-Type'
+        CORS_HEADERS='Content-Type',
+        WARM_UP_ON_START=True  # Blueprints preload models/instances on registration
     )
     
     if config:
@@ -154,22 +191,31 @@ def create_app(config=None):
 
 def main():
     """Main entry point"""
-    app = create_app()
+    # app.run(debug=True) serves from a reloader child; the watcher parent runs create_app()
+    # too, so only the process that actually serves warms models and browsers
+    use_reloader = not GEVENT_ENABLED
+    warm_up = not use_reloader or os.environ.get('WERKZEUG_RUN_MAIN') == 'true'
+    app = create_app({'WARM_UP_ON_START': warm_up})
     
     # Always use port 5000 for backend API (frontend uses 3000)
-    import os
     port = int(os.environ.get('PORT', 5000))
     
     logger.info(f"Starting Decluttered.AI Unified API on port {port}")
     logger.info("Press Ctrl+C to stop")
     
     try:
-        app.run(
-            host='0.0.0.0',
-            port=port,
-            debug=True,
-            threaded=True
-        )
+        if GEVENT_ENABLED:
+            from gevent.pywsgi import WSGIServer
+            logger.info("Serving with gevent (cooperative I/O)")
+            WSGIServer(('0.0.0.0', port), app).serve_forever()
+        else:
+            app.run(
+                host='0.0.0.0',
+                port=port,
+                debug=True,
+                use_reloader=use_reloader,
+                threaded=True
+            )
     except KeyboardInterrupt:
         logger.info("Server stopped by user")
     except Exception as e:
@@ -33,6 +33,8 @@ export default function AIChatbot({ listings, salesData, platformStats }: AIChat
   const [inputValue, setInputValue] = useState('');
   const [isTyping, setIsTyping] = useState(false);
   const messagesEndRef = useRef<HTMLDivElement>(null);
+  // Lets the backend reuse its Gemini context cache across turns of this chat
+  const sessionIdRef = useRef(crypto.randomUUID());
 
   // Auto-scroll to bottom
   useEffect(() => {
@@ -77,7 +79,8 @@ export default function AIChatbot({ listings, salesData, platformStats }: AIChat
         body: JSON.stringify({
           message: text,
           context: context,
-          history: history
+          history: history,
+          session_id: sessionIdRef.current
         }),
       });
 
@@ -1,6 +1,13 @@
 
 import os
+import ast
+import functools
+import hashlib
+import json
+import re
+from io import BytesIO
 from dotenv import load_dotenv
+from PIL import Image
 import google.generativeai as genai
 
 # Load API key from .env
@@ -22,6 +29,107 @@ except Exception as e:
     print(f"Error details: {e}")
     MODEL = None
 
+# Gemini downsamples images internally; anything beyond this long edge is wasted upload
+GEMINI_MAX_IMAGE_EDGE = 768
+
+# Matches a leading ```json / ``` fence line and a trailing ``` fence
+_CODE_FENCE = re.compile(r"^```(?:json|python)?|```$", re.M)
+# First '[' through last ']' - pulls the array out of any surrounding prose
+_LIST_LITERAL = re.compile(r"\[.*\]", re.S)
+
+# Ask Gemini for a bare JSON array so replies need no cleanup in the common case
+JSON_LIST_CONFIG = {"response_mime_type": "application/json"}
+
+# Replies for identical (image, prompt) pairs are reused across runs from this folder.
+# Bump PROMPT_VERSION whenever the object-listing prompt changes.
+PROMPT_VERSION = "objects-v1"
+GEMINI_CACHE_DIR = ".gemini_cache"
+GEMINI_CACHE_ENABLED = os.getenv("DECLUTTER_GEMINI_CACHE", "1") == "1"
+
+# ----------------------------------------------------------------------
+# --- Helper: Disk cache for Gemini replies ---
+# ----------------------------------------------------------------------
+
+def disk_cached(fn):
+    """
+    Caches fn(image) replies on disk keyed by sha256 of the image bytes and PROMPT_VERSION.
+    `image` is a file path or JPEG bytes. Failed calls raise and are never cached.
+    """
+    @functools.wraps(fn)
+    def wrapper(image):
+        if not GEMINI_CACHE_ENABLED or MODEL is None:
+            return fn(image)
+
+        if isinstance(image, (bytes, bytearray)):
+            image_bytes = bytes(image)
+        else:
+            with open(image, "rb") as f:
+                image_bytes = f.read()
+        key = hashlib.sha256(image_bytes + PROMPT_VERSION.encode("utf-8")).hexdigest()
+        cache_path = os.path.join(GEMINI_CACHE_DIR, f"{key}.json")
+
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            pass
+
+        reply = fn(image)
+        os.makedirs(GEMINI_CACHE_DIR, exist_ok=True)
+        # Write then rename so a concurrent reader never sees a half-written entry
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(reply)
+        os.replace(tmp_path, cache_path)
+        return reply
+    return wrapper
+
+# ----------------------------------------------------------------------
+# --- Helper: Parse Gemini's list reply without eval() ---
+# ----------------------------------------------------------------------
+
+def parse_gemini_list(raw_text):
+    """
+    Parses a list reply from Gemini (a JSON array, "['laptop', 'book']", or either
+    wrapped in code fences / prose) into a list of strings. Uses json.loads, then
+    ast.literal_eval for Python-style single quotes; never evaluates arbitrary code.
+    """
+    if not raw_text:
+        return []
+
+    cleaned = _CODE_FENCE.sub("", raw_text.strip()).strip()
+    match = _LIST_LITERAL.search(cleaned)
+    if match:
+        cleaned = match.group(0)
+    try:
+        parsed = json.loads(cleaned)
+    except json.JSONDecodeError:
+        try:
+            parsed = ast.literal_eval(cleaned)
+        except (ValueError, SyntaxError):
+            return []
+
+    if not isinstance(parsed, (list, tuple)):
+        return []
+    return [str(item).strip() for item in parsed if str(item).strip()]
+
+def load_image_for_gemini(image_path):
+    """
+    Returns JPEG bytes for the image, shrunk in memory so its long edge is at most
+    GEMINI_MAX_IMAGE_EDGE. Falls back to the raw file bytes if it cannot be decoded.
+    """
+    try:
+        with Image.open(image_path) as img:
+            img = img.convert("RGB")
+            img.thumbnail((GEMINI_MAX_IMAGE_EDGE, GEMINI_MAX_IMAGE_EDGE), Image.LANCZOS)
+            buffer = BytesIO()
+            img.save(buffer, format="JPEG", quality=85)
+            return buffer.getvalue()
+    except Exception as e:
+        print(f"[WARN] Could not resize {image_path} for Gemini, sending original: {e}")
+        with open(image_path, "rb") as f:
+            return f.read()
+
 # ----------------------------------------------------------------------
 # --- Function 1: IMAGE & TEXT PROCESSING (Primary Function for YOLO Workflow) ---
 # ----------------------------------------------------------------------
@@ -44,13 +152,16 @@ def process_image_and_objects_for_resale(image_path, yolo_object_list_str):
             "**Be permissive and include all functional electronics (e.g., laptop, keyboard), quality bags, and any items "
             "that appear to be branded or in excellent condition.** "
             
-            "Return a Python list of the object names from the provided list "
-            "that correspond to resellable items. Example format: ['laptop', 'handbag', 'book']. "
+            "Return ONLY a JSON array of strings with the object names from the provided list "
+            'that correspond to resellable items. Example format: ["laptop", "handbag", "book"]. '
             "Do not add any extra text or explanation."
         )
 
         # 3. Generate content using the image and prompt
-        response = MODEL.generate_content([prompt, {"mime_type": "image/jpeg", "data": open(image_path, "rb").read()}])
+        response = MODEL.generate_content(
+            [prompt, {"mime_type": "image/jpeg", "data": load_image_for_gemini(image_path)}],
+            generation_config=JSON_LIST_CONFIG
+        )
         
         # Print Gemini's raw reply for debugging (as requested)
         print(f"  [Gemini Raw Reply]: {response.text.strip()}")
@@ -61,6 +172,34 @@ def process_image_and_objects_for_resale(image_path, yolo_object_list_str):
         print(f"[Error] process_image_and_objects_for_resale failed: {e}")
         return "[]" 
 
+# ----------------------------------------------------------------------
+# --- Function 1b: OBJECT LISTING (Used by the live change detector) ---
+# ----------------------------------------------------------------------
+
+@disk_cached
+def process_image_with_gemini(image):
+    """
+    Lists the distinct physical objects visible in an image. `image` is either a file
+    path or JPEG bytes already encoded in memory. Returns a JSON array string,
+    e.g. '["laptop", "coffee cup"]'. API errors are raised so callers can retry them.
+    Replies are cached on disk (see disk_cached).
+    """
+    if MODEL is None:
+        return "[]"
+
+    image_bytes = bytes(image) if isinstance(image, (bytes, bytearray)) else load_image_for_gemini(image)
+    prompt = (
+        "Identify the distinct physical objects clearly visible in this image. "
+        'Return ONLY a JSON array of short object names. Example format: ["laptop", "coffee cup"]. '
+        "Do not add any extra text or explanation."
+    )
+
+    response = MODEL.generate_content(
+        [prompt, {"mime_type": "image/jpeg", "data": image_bytes}],
+        generation_config=JSON_LIST_CONFIG
+    )
+    return response.text.strip()
+
 # ----------------------------------------------------------------------
 # --- Function 2: TEXT PROCESSING (Needed by the main script's import, though unused) ---
 # ----------------------------------------------------------------------
@@ -22,14 +22,19 @@ from PIL import Image
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 from ultralytics import YOLO
+import torch
+import torch.nn.functional as F
 from supabase import create_client, Client
 from dotenv import load_dotenv
 import tempfile
+import asyncio
+import threading
+import numpy as np
 from io import BytesIO
 
 # API imports for integration
 try:
-    from gemini_ACCESS import process_image_and_objects_for_resale, process_text_with_gemini
+    from gemini_ACCESS import process_image_and_objects_for_resale
     GEMINI_ACCESS_AVAILABLE = True
 except ImportError:
     print("⚠️ gemini_ACCESS.py not found - using fallback object filtering")
@@ -41,6 +46,13 @@ load_dotenv()
 # Configuration
 CROP_BORDER_PERCENTAGE = 0.4  # Increased from 0.2 for more generous cropping
 MAX_RESELLABLE_OBJECTS = 10
+YOLO_MAX_BATCH = 8  # Largest dynamic batch the TensorRT engine is built for
+YOLO_WEIGHTS = "yolov9c.pt"
+YOLO_ENGINE = "yolov9c.engine"  # TensorRT FP16 engine, built once from YOLO_WEIGHTS
+YOLO_USE_TENSORRT = os.getenv('YOLO_USE_TENSORRT', 'true').lower() == 'true'
+YOLO_HALF = torch.cuda.is_available()  # FP16 inference runs convs on tensor cores
+YOLO_IMGSZ = 640
+YOLO_GPU_PREPROCESS = torch.cuda.is_available()  # Letterbox + normalize on the GPU
 REPORT_FILENAME = "pipeline_analysis_report.txt"
 
 # API endpoints
@@ -55,6 +67,36 @@ EBAY_LISTING_URL = f"{API_BASE_URL}:5000/api/listing/ebay"
 SUPABASE_URL = os.getenv('SUPABASE_URL')
 SUPABASE_ANON_KEY = os.getenv('SUPABASE_ANON_KEY')
 
+# Process-wide YOLO model, shared by every pipeline instance so repeated runs in a
+# long-lived process (the unified API) skip the weight load and cuDNN/TensorRT warm-up
+_shared_yolo_model = None
+_shared_yolo_lock = threading.Lock()
+
+def expand_and_clip_boxes(boxes: np.ndarray, width: int, height: int, pct: float) -> np.ndarray:
+    """Grow (N, 4) xyxy boxes by pct of their size on each side and clip them to the image"""
+    border = ((boxes[:, 2:] - boxes[:, :2]) * pct).astype(np.int32)
+    expanded = boxes + np.concatenate([-border, border], axis=1)
+    np.clip(expanded[:, 0::2], 0, width, out=expanded[:, 0::2])
+    np.clip(expanded[:, 1::2], 0, height, out=expanded[:, 1::2])
+    return expanded
+
+def letterbox_on_gpu(frame: np.ndarray, size: int = YOLO_IMGSZ):
+    """
+    Letterbox a BGR uint8 frame to size x size on the GPU and return an RGB 0-1 NCHW
+    tensor plus the (scale, (pad_x, pad_y)) needed to map boxes back to the frame.
+    Only the raw uint8 frame crosses the bus; resize and normalization run on CUDA.
+    """
+    h, w = frame.shape[:2]
+    scale = min(size / h, size / w)
+    new_h, new_w = int(round(h * scale)), int(round(w * scale))
+    pad_x, pad_y = (size - new_w) // 2, (size - new_h) // 2
+    
+    tensor = torch.from_numpy(frame).to("cuda", non_blocking=True)
+    tensor = tensor.flip(-1).permute(2, 0, 1).unsqueeze(0).float().div_(255.0)
+    tensor = F.interpolate(tensor, size=(new_h, new_w), mode="bilinear", align_corners=False)
+    tensor = F.pad(tensor, (pad_x, size - new_w - pad_x, pad_y, size - new_h - pad_y), value=114 / 255.0)
+    return tensor, (scale, (pad_x, pad_y))
+
 class ObjectDetectionPipeline:
     def __init__(self):
         self.yolo_model = None
@@ -66,14 +108,74 @@ class ObjectDetectionPipeline:
         print("🔥 Object Detection Pipeline initialized")
     
     def setup_yolo(self):
-        """Initialize YOLO model"""
+        """Attach the shared YOLO model, loading and warming it on first use"""
+        global _shared_yolo_model
+        with _shared_yolo_lock:
+            if _shared_yolo_model is None:
+                self.load_yolo()
+                if self.yolo_model:
+                    self.warm_up_yolo()
+                    _shared_yolo_model = self.yolo_model
+            else:
+                self.yolo_model = _shared_yolo_model
+                print("✅ Reusing warm YOLOv9 model")
+    
+    def warm_up_yolo(self):
+        """Run one dummy inference so the first real image does not pay kernel selection"""
+        try:
+            dummy = np.zeros((640, 640, 3), dtype=np.uint8)
+            self.yolo_model.predict(source=dummy, half=YOLO_HALF, save=False, verbose=False)
+        except Exception as e:
+            print(f"⚠️ YOLO warm-up failed: {e}")
+    
+    def load_yolo(self):
+        """Initialize YOLO model, preferring the TensorRT engine on GPU"""
+        engine_path = self.build_tensorrt_engine()
+        if engine_path:
+            try:
+                self.yolo_model = YOLO(engine_path, task="detect")
+                print("✅ YOLOv9 TensorRT engine loaded successfully")
+                return
+            except Exception as e:
+                print(f"⚠️ Could not load TensorRT engine, falling back to PyTorch weights: {e}")
+        
         try:
-            self.yolo_model = YOLO("yolov9c.pt")
+            self.yolo_model = YOLO(YOLO_WEIGHTS)
+            self.tune_torch_backend()
             print("✅ YOLOv9 model loaded successfully")
         except Exception as e:
             print(f"❌ Could not load YOLO model: {e}")
             self.yolo_model = None
     
+    def tune_torch_backend(self):
+        """Enable cuDNN autotuning, TF32 matmuls and NHWC layout for the PyTorch model"""
+        if not torch.cuda.is_available():
+            return
+        
+        # Inputs are letterboxed to a fixed 640x640, so the autotuned algo is reused every call
+        torch.backends.cudnn.benchmark = True
+        torch.set_float32_matmul_precision("high")
+        self.yolo_model.model = self.yolo_model.model.to(memory_format=torch.channels_last)
+    
+    def build_tensorrt_engine(self) -> Optional[str]:
+        """Export the YOLO weights to a TensorRT FP16 engine once and return its path"""
+        if not YOLO_USE_TENSORRT or not torch.cuda.is_available():
+            return None
+        
+        if os.path.exists(YOLO_ENGINE):
+            return YOLO_ENGINE
+        
+        try:
+            print("🔧 Exporting YOLOv9 to TensorRT FP16 engine (one-time)...")
+            exported = YOLO(YOLO_WEIGHTS).export(
+                format="engine", half=True, dynamic=True,
+                imgsz=640, batch=YOLO_MAX_BATCH, device=0
+            )
+            return exported if exported and os.path.exists(exported) else None
+        except Exception as e:
+            print(f"⚠️ TensorRT export failed: {e}")
+            return None
+    
     def setup_database(self):
         """Initialize Supabase client"""
         try:
@@ -199,13 +301,14 @@ class ObjectDetectionPipeline:
             print("❌ YOLO model not available")
             return []
         
-        print(f"🔍 Processing image: {os.path.basename(image_path)}")
+        image_name = os.path.basename(image_path)
+        print(f"🔍 Processing image: {image_name}")
         
         try:
             # Upload original image to storage and save to database
             print("[DEBUG] Starting storage upload...")
             timestamp = int(time.time())
-            original_storage_name = f"original_{timestamp}_{os.path.basename(image_path)}"
+            original_storage_name = f"original_{timestamp}_{image_name}"
             storage_url = self.upload_to_storage(image_path, "used_upload", original_storage_name)
             print(f"[DEBUG] Storage upload complete, URL: {storage_url}")
             
@@ -221,14 +324,21 @@ class ObjectDetectionPipeline:
                 print(f"❌ Image file does not exist: {image_path}")
                 return []
                 
-            try:
-                img_check = Image.open(image_path)
-                print(f"[DEBUG] Image opened successfully. Size: {img_check.size}, Mode: {img_check.mode}")
-            except Exception as e:
-                print(f"❌ Failed to open image with PIL: {e}")
+            # Decode once; the same array feeds YOLO and every crop
+            frame = cv2.imread(image_path)
+            if frame is None:
+                print(f"❌ Failed to decode image: {image_path}")
+                return []
+            print(f"[DEBUG] Image decoded successfully. Size: {frame.shape[1]}x{frame.shape[0]}")
             
-            # Run inference with lower threshold for debugging
-            results = self.yolo_model.predict(source=image_path, conf=0.1, save=False, verbose=True)
+            letterbox = None
+            if YOLO_GPU_PREPROCESS:
+                # Boxes come back in letterboxed 640x640 space and are mapped back below
+                tensor, letterbox = letterbox_on_gpu(frame)
+                results = self.yolo_model.predict(source=tensor, conf=0.1, half=YOLO_HALF, save=False, verbose=True)
+            else:
+                # Run inference with lower threshold for debugging
+                results = self.yolo_model.predict(source=frame, conf=0.1, half=YOLO_HALF, save=False, verbose=True)
             print(f"[DEBUG] YOLO detection complete. Results object: {results}")
             
             if len(results) > 0:
@@ -238,29 +348,14 @@ class ObjectDetectionPipeline:
             
             all_detections = {}
             for result in results:
-                for box in result.boxes:
-                    class_id = int(box.cls[0].item())
-                    class_name = self.yolo_model.names[class_id]
-                    
-                    # Map 'clock' to 'watch' since YOLOv9 (COCO) doesn't have 'watch'
-                    if class_name == 'clock':
-                        class_name = 'watch'
-                        
-                    coords = tuple(int(c) for c in box.xyxy[0].tolist())
-                    confidence = float(box.conf[0].item())
-                    
-                    all_detections[coords] = {
-                        "class_name": class_name,
-                        "confidence": confidence
-                    }
+                all_detections.update(self.largest_instances_from_result(result, letterbox, frame.shape))
             
             if not all_detections:
                 print("⚠️ No objects detected by YOLO")
                 # Fallback: If no objects detected, treat the whole image as one object
                 print("🔄 FALLBACK: Treating entire image as one object")
                 
-                img = Image.open(image_path)
-                w, h = img.size
+                h, w = frame.shape[:2]
                 
                 # Create a fake detection for the whole image
                 all_detections[(0, 0, w, h)] = {
@@ -286,22 +381,32 @@ class ObjectDetectionPipeline:
             # Crop and process resellable objects
             processed_objects = []
             crop_index = 0
+            # Case-insensitive lookup set, built once instead of per detection
+            resellable_names_normalized = frozenset(obj.lower() for obj in resellable_objects)
+            
+            # Border expansion + clipping for every box in one vectorized step
+            img_height, img_width = frame.shape[:2]
+            detection_coords = list(filtered_detections)
+            crop_boxes = dict(zip(detection_coords, expand_and_clip_boxes(
+                np.array(detection_coords, dtype=np.int32).reshape(-1, 4),
+                img_width, img_height, CROP_BORDER_PERCENTAGE
+            ).tolist()))
             
             for coords, detection in filtered_detections.items():
-                # Case-insensitive check
-                if detection["class_name"].lower() in [obj.lower() for obj in resellable_objects]:
+                class_name = detection["class_name"]
+                if class_name.lower() in resellable_names_normalized:
                     crop_index += 1
                     
                     # Crop the object with generous border
                     cropped_path = self.crop_and_save_object(
-                        image_path, coords, detection["class_name"], timestamp, crop_index
+                        frame, crop_boxes[coords], class_name, timestamp, crop_index
                     )
                     
                     if cropped_path:
                         # Ensure absolute path
                         cropped_path = os.path.abspath(cropped_path)
                         # Upload cropped image to storage
-                        cropped_storage_name = f"cropped_{timestamp}_{crop_index}_{detection['class_name']}.png"
+                        cropped_storage_name = f"cropped_{timestamp}_{crop_index}_{class_name}.png"
                         
                         # Determine content type based on extension
                         content_type = "image/png" if cropped_path.lower().endswith(".png") else "image/jpeg"
@@ -325,7 +430,7 @@ class ObjectDetectionPipeline:
                         
                         # Prepare object data
                         object_data = {
-                            "object_name": detection["class_name"],
+                            "object_name": class_name,
                             "confidence": detection["confidence"],
                             "bounding_box": {
                                 "x": coords[0],
@@ -344,7 +449,7 @@ class ObjectDetectionPipeline:
                         object_data["cropped_id"] = cropped_id
                         
                         processed_objects.append(object_data)
-                        print(f"✅ Cropped: {detection['class_name']} (confidence: {detection['confidence']:.2f}) with generous border")
+                        print(f"✅ Cropped: {class_name} (confidence: {detection['confidence']:.2f}) with generous border")
             
             # Update photo as processed
             if self.supabase_client and self.current_photo_id:
@@ -359,27 +464,63 @@ class ObjectDetectionPipeline:
             print(f"❌ Error processing image: {e}")
             return []
     
+    def largest_instances_from_result(self, result, letterbox=None, frame_shape=None) -> Dict:
+        """Reduce a YOLO result to the largest box per class using tensor ops.
+        
+        letterbox is the (scale, (pad_x, pad_y)) from letterbox_on_gpu, if used.
+        """
+        boxes = result.boxes
+        if boxes is None or len(boxes) == 0:
+            return {}
+        
+        xyxy = boxes.xyxy
+        if letterbox is not None:
+            scale, (pad_x, pad_y) = letterbox
+            offset = torch.tensor([pad_x, pad_y, pad_x, pad_y], dtype=xyxy.dtype, device=xyxy.device)
+            xyxy = (xyxy - offset) / scale
+            xyxy[:, 0::2] = xyxy[:, 0::2].clamp(0, frame_shape[1])
+            xyxy[:, 1::2] = xyxy[:, 1::2].clamp(0, frame_shape[0])
+        cls = boxes.cls.to(torch.int64)
+        areas = (xyxy[:, 2] - xyxy[:, 0]) * (xyxy[:, 3] - xyxy[:, 1])
+        
+        # Sort by area (largest first); the first position of each class is its largest box
+        order = torch.argsort(areas, descending=True)
+        _, inverse = torch.unique(cls[order], return_inverse=True)
+        positions = torch.arange(order.numel(), device=order.device)
+        first = torch.full((int(inverse.max()) + 1,), order.numel(), dtype=torch.int64, device=order.device)
+        first = first.scatter_reduce(0, inverse, positions, reduce="amin")
+        best = order[first]
+        
+        # Single device->host transfer for all kept boxes
+        best_xyxy = xyxy[best].int().cpu().tolist()
+        best_cls = cls[best].cpu().tolist()
+        best_conf = boxes.conf[best].float().cpu().tolist()
+        
+        names = self.yolo_model.names
+        detections = {}
+        for coords, class_id, confidence in zip(best_xyxy, best_cls, best_conf):
+            class_name = names[class_id]
+            # Map 'clock' to 'watch' since YOLOv9 (COCO) doesn't have 'watch'
+            if class_name == 'clock':
+                class_name = 'watch'
+            detections[tuple(coords)] = {
+                "class_name": class_name,
+                "confidence": confidence
+            }
+        
+        return detections
+    
     def select_largest_instances(self, all_detections: Dict) -> Dict:
         """Select only the largest instance of each object type"""
         class_largest = {}
         
         for coords, detection in all_detections.items():
-            class_name = detection["class_name"]
-            area = self.calculate_bbox_area(coords)
-            
-            if class_name not in class_largest:
-                class_largest[class_name] = (coords, detection, area)
-            else:
-                current_coords, current_detection, current_area = class_largest[class_name]
-                if area > current_area:
-                    class_largest[class_name] = (coords, detection, area)
-        
-        # Convert back to original format
-        filtered_detections = {}
-        for class_name, (coords, detection, area) in class_largest.items():
-            filtered_detections[coords] = detection
+            area = (coords[2] - coords[0]) * (coords[3] - coords[1])
+            current = class_largest.get(detection["class_name"])
+            if current is None or area > current[2]:
+                class_largest[detection["class_name"]] = (coords, detection, area)
         
-        return filtered_detections
+        return {coords: detection for coords, detection, _ in class_largest.values()}
     
     def calculate_bbox_area(self, coords: Tuple[int, int, int, int]) -> int:
         """Calculate bounding box area"""
@@ -394,29 +535,14 @@ class ObjectDetectionPipeline:
         # Return all detected objects - let the main.py recognition API decide what's resellable
         return detected_objects
     
-    def crop_and_save_object(self, original_image_path: str, coords: Tuple, 
+    def crop_and_save_object(self, frame, crop_box: Tuple, 
                            object_name: str, timestamp: int, index: int) -> Optional[str]:
-        """Crop object from original image and save it"""
+        """Crop an already border-expanded box from the decoded BGR frame and save it"""
         try:
-            img = Image.open(original_image_path)
-            img_width, img_height = img.size
+            new_x_min, new_y_min, new_x_max, new_y_max = crop_box
             
-            x_min, y_min, x_max, y_max = coords
-            
-            # Add border
-            object_width = x_max - x_min
-            object_height = y_max - y_min
-            border_x = int(object_width * CROP_BORDER_PERCENTAGE)
-            border_y = int(object_height * CROP_BORDER_PERCENTAGE)
-            
-            # Expand coordinates with border
-            new_x_min = max(0, x_min - border_x)
-            new_y_min = max(0, y_min - border_y)
-            new_x_max = min(img_width, x_max + border_x)
-            new_y_max = min(img_height, y_max + border_y)
-            
-            # Crop image
-            cropped_img = img.crop((new_x_min, new_y_min, new_x_max, new_y_max))
+            # Crop image (NumPy slice - a view, no decode or copy)
+            cropped_img = frame[new_y_min:new_y_max, new_x_min:new_x_max]
             
             # Create cropped directory if it doesn't exist
             os.makedirs("cropped_resellables", exist_ok=True)
@@ -426,8 +552,10 @@ class ObjectDetectionPipeline:
             crop_filename = f"{timestamp}_{index}_{safe_object_name}.png"
             crop_path = os.path.join("cropped_resellables", crop_filename)
             
-            # Save as PNG (supports RGBA, so no need for complex conversion)
-            cropped_img.save(crop_path, "PNG")
+            # Save as PNG straight from the BGR array
+            if not cv2.imwrite(crop_path, cropped_img):
+                print(f"❌ Failed to encode image: {crop_filename}")
+                return None
             
             # Verify the file was saved correctly
             if os.path.exists(crop_path) and os.path.getsize(crop_path) > 0:
@@ -502,6 +630,16 @@ class ObjectDetectionPipeline:
             print(f"❌ Recognition API call failed: {e}")
             return None
     
+    def recognize_objects(self, processed_objects: List[Dict]) -> List[Optional[Dict]]:
+        """Call the recognition API for every cropped object concurrently (I/O bound)"""
+        async def recognize_all():
+            return await asyncio.gather(*[
+                asyncio.to_thread(self.call_recognition_api, obj["cropped_path"])
+                for obj in processed_objects
+            ])
+        
+        return asyncio.run(recognize_all())
+    
     def call_scraper_api(self, product_name: str) -> Optional[Dict]:
         """Call the scraper API for market prices"""
         try:
@@ -749,6 +887,8 @@ class ObjectDetectionPipeline:
             
             # Step 2: Process Each Object Through Recognition → Scraping → Listing
             print(f"\n🚀 Starting Step 2: Processing {len(processed_objects)} objects...")
+            # Recognition calls are independent network round-trips - run them all at once
+            recognition_results = self.recognize_objects(processed_objects)
             for i, obj_data in enumerate(processed_objects):
                 print(f"\n2️⃣ PROCESSING OBJECT {i+1}/{len(processed_objects)}: {obj_data['object_name']}")
                 print("-" * 40)
@@ -763,7 +903,7 @@ class ObjectDetectionPipeline:
                 }
                 
                 # Step 2a: Recognition API to determine if object is actually resellable
-                recognition_result = self.call_recognition_api(obj_data["cropped_path"])
+                recognition_result = recognition_results[i]
                 obj_result["recognition_result"] = recognition_result
                 
                 # Check if recognition API found a valid product (indicating resellability)